@@ -2,22 +2,28 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
 import logging
 
-from .const import CONF_WEBHOOK_ENABLED, DOMAIN
+from .const import CONF_STALE_TTL, CONF_STATE_MAP, CONF_WEBHOOK_ENABLED, DOMAIN, OlarmConf, HOT_OPTIONS, INTERVAL_OPTIONS
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_WEBHOOK_ID, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.components import webhook
-from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import config_validation as cv, device_registry as dr, entity_registry as er
 
 from .coordinator import OlarmCoordinator
+from .olarm_api import APIAuthError, APIConnectionError
+from .services import async_setup_services
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Mapping
+
+    from homeassistant.helpers.device_registry import DeviceEntry
+    from homeassistant.helpers.typing import ConfigType
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,6 +31,8 @@ _LOGGER = logging.getLogger(__name__)
 # For your initial PR, limit it to 1 platform.
 _PLATFORMS: list[Platform] = [Platform.ALARM_CONTROL_PANEL, Platform.SENSOR, Platform.BUTTON]
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
 # TODO Create ConfigEntry type alias with API object
 # TODO Rename type alias and update all entry annotations
 type OlarmConfigEntry = ConfigEntry[RuntimeData]
@@ -32,8 +40,15 @@ type OlarmConfigEntry = ConfigEntry[RuntimeData]
 @dataclass
 class RuntimeData:
     """Class to hold your data."""
-    coordinator: DataUpdateCoordinator
+    coordinator: OlarmCoordinator
     webhook_registered: bool = False
+    # Options the entry is currently running with, compared on update to apply only the changes
+    options: dict[str, Any] = field(default_factory=dict)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Olarm Integration services."""
+    async_setup_services(hass)
+    return True
 
 # TODO Update entry annotation
 async def async_setup_entry(hass: HomeAssistant, config_entry: OlarmConfigEntry) -> bool:
@@ -63,51 +78,133 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: OlarmConfigEntry)
         await setup_webhook(hass, config_entry.options.get(CONF_WEBHOOK_ID), coordinator.async_handle_webhook)
     # Add the coordinator and update listener to config runtime data to make
     # accessible throughout your integration
-    config_entry.runtime_data = RuntimeData(coordinator,config_entry.options.get(CONF_WEBHOOK_ENABLED, False))
+    config_entry.runtime_data = RuntimeData(coordinator,config_entry.options.get(CONF_WEBHOOK_ENABLED, False), dict(config_entry.options))
 
     # Setup platforms (based on the list of entity types in PLATFORMS defined above)
     # This calls the async_setup method in each of your entity type files.
     _LOGGER.debug("Setup Olarm Device")
-    device_registry = dr.async_get(hass)
-    for olarmdevice in coordinator.get_olarm_conf_data().values():
-        device_registry.async_get_or_create(
-            config_entry_id=config_entry.entry_id,
-        #     connections={(dr.CONNECTION_NETWORK_MAC, config.mac)},
-            identifiers={(DOMAIN, f"{coordinator.data.controller_name}-{olarmdevice.serial_number}")},
-            manufacturer="Olarm",
-        #     suggested_area="Kitchen",
-            name=olarmdevice.label,
-            model=olarmdevice.type,
-        #     model_id=config.modelid,
-            sw_version=olarmdevice.firmware_version,
-        #     hw_version=config.hwversion,
-        )
-        device_registry.async_get_or_create(
-            config_entry_id=config_entry.entry_id,
-        #     connections={(dr.CONNECTION_NETWORK_MAC, config.mac)},
-            identifiers={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarmdevice.alarm_conf.id}")},
-            via_device=(DOMAIN, f"{coordinator.data.controller_name}-{olarmdevice.serial_number}"),
-            manufacturer="Unknown",
-        #     suggested_area="Kitchen",
-            name=f"{olarmdevice.alarm_conf.label} (Alarm System)",
-            model=f"{olarmdevice.alarm_conf.alarm_make} - {olarmdevice.alarm_conf.alarm_make_detail}",
-        #     model_id=config.modelid,
-            sw_version="Unknown",
-
-        #     hw_version=config.hwversion,
-        )
+    coordinator.async_mark_startup("first_refresh")
+    async_register_devices(hass, config_entry, coordinator.data.controller_name, coordinator.get_olarm_conf_data().values())
+    coordinator.async_mark_startup("device_registry")
 
     _LOGGER.debug("Setup Platforms")
     await hass.config_entries.async_forward_entry_setups(config_entry, _PLATFORMS)
+    coordinator.async_mark_startup("platforms")
 
     # Return true to denote a successful setup.
     return True
 
-async def _async_update_listener(hass: HomeAssistant, config_entry):
+def get_device_registry_entries(controller_name: str, olarmdevice: OlarmConf) -> list[dict[str, Any]]:
+    """Return the device registry entries of an Olarm device and its alarm system."""
+    return [
+        {
+            "identifiers": {(DOMAIN, f"{controller_name}-{olarmdevice.serial_number}")},
+            "manufacturer": "Olarm",
+            "name": olarmdevice.label,
+            "model": olarmdevice.type,
+            "sw_version": olarmdevice.firmware_version,
+        },
+        {
+            "identifiers": {(DOMAIN, f"{controller_name}-alarm_system-{olarmdevice.alarm_conf.id}")},
+            "via_device": (DOMAIN, f"{controller_name}-{olarmdevice.serial_number}"),
+            "manufacturer": "Unknown",
+            "name": f"{olarmdevice.alarm_conf.label} (Alarm System)",
+            "model": f"{olarmdevice.alarm_conf.alarm_make} - {olarmdevice.alarm_conf.alarm_make_detail}",
+            "sw_version": "Unknown",
+        },
+    ]
+
+@callback
+def async_register_devices(hass: HomeAssistant, config_entry: ConfigEntry, controller_name: str, olarmdevices: Iterable[OlarmConf]) -> None:
+    """Create the registry devices, skipping those already registered unchanged."""
+    device_registry = dr.async_get(hass)
+    # The devices of the entry are read once, only new or changed devices are written
+    registered = {
+        identifier: device
+        for device in dr.async_entries_for_config_entry(device_registry, config_entry.entry_id)
+        for identifier in device.identifiers
+    }
+    for entry in (entry for olarmdevice in olarmdevices for entry in get_device_registry_entries(controller_name, olarmdevice)):
+        device = registered.get(next(iter(entry["identifiers"])))
+        if device is not None and (device.name, device.model, device.sw_version) == (entry["name"], entry["model"], entry["sw_version"]):
+            continue
+        device_registry.async_get_or_create(config_entry_id=config_entry.entry_id, **entry)
+
+async def _async_update_listener(hass: HomeAssistant, config_entry: OlarmConfigEntry):
     """Handle config options update."""
-    # Reload the integration when the options change.
-    # await config_entry.runtime_data.coordinator.async_options_updated()
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    runtime_data = config_entry.runtime_data
+    changed = get_changed_options(runtime_data.options, config_entry.options)
+    if not changed:
+        return
+    # Everything the options flow sets can be applied in place, anything else falls back to a reload
+    if not changed <= HOT_OPTIONS | config_entry.data["devices"].keys():
+        _LOGGER.debug("Reloading for options %s", changed)
+        await hass.config_entries.async_reload(config_entry.entry_id)
+        return
+
+    _LOGGER.debug("Applying options %s", changed)
+    coordinator = runtime_data.coordinator
+    old_options, runtime_data.options = runtime_data.options, dict(config_entry.options)
+    added, removed = coordinator.async_apply_options(config_entry)
+
+    # Only re-register the webhook when its id or enabled state changed
+    if changed & {CONF_WEBHOOK_ENABLED, CONF_WEBHOOK_ID}:
+        if runtime_data.webhook_registered:
+            await unregister_webhook(hass, old_options.get(CONF_WEBHOOK_ID))
+            runtime_data.webhook_registered = False
+        if coordinator.webhook_enabled:
+            runtime_data.webhook_registered = await setup_webhook(hass, coordinator.webhook_id, coordinator.async_handle_webhook)
+
+    for device_id in removed:
+        async_remove_device(hass, config_entry, device_id)
+
+    # The coordinator registers the added devices and adds their entities once they are merged
+    for device_id in added:
+        try:
+            await coordinator.async_add_tracked_device(device_id)
+        except (APIAuthError, APIConnectionError) as err:
+            _LOGGER.error("Unable to add device %s: %s", device_id, err)
+
+    # Panels show the new state mapping, and entities the new staleness, on the next write of their state
+    coordinators = [coordinator, *coordinator.shards.values()]
+    if removed or added or changed & {CONF_STATE_MAP, CONF_STALE_TTL}:
+        for each in coordinators:
+            each.async_update_listeners()
+    if changed & INTERVAL_OPTIONS:
+        for each in coordinators:
+            await each.async_request_refresh()
+
+def get_changed_options(old_options: Mapping[str, Any], new_options: Mapping[str, Any]) -> set[str]:
+    """Return the option keys whose value changed."""
+    return {key for key in old_options.keys() | new_options.keys() if old_options.get(key) != new_options.get(key)}
+
+@callback
+def async_remove_device(hass: HomeAssistant, config_entry: OlarmConfigEntry, device_id: str) -> None:
+    """Remove the registry devices and entities of a device that is no longer tracked."""
+    coordinator = config_entry.runtime_data.coordinator
+    olarmdevice = coordinator.get_olarm_conf_data().get(device_id)
+    coordinator.async_remove_tracked_device(device_id)
+    if olarmdevice is None:
+        return
+
+    device_registry = dr.async_get(hass)
+    entity_registry = er.async_get(hass)
+    devices = [
+        device
+        for entry in get_device_registry_entries(coordinator.data.controller_name, olarmdevice)
+        if (device := device_registry.async_get_device(identifiers=entry["identifiers"])) is not None
+    ]
+    # Zone sensors have their own devices, connected via the alarm system
+    devices += [
+        device
+        for device in dr.async_entries_for_config_entry(device_registry, config_entry.entry_id)
+        if device.via_device_id in {parent.id for parent in devices}
+    ]
+    for device in devices:
+        for entity in er.async_entries_for_device(entity_registry, device.id, include_disabled_entities=True):
+            coordinator.entity_unique_ids.discard(entity.unique_id)
+            entity_registry.async_remove(entity.entity_id)
+        device_registry.async_update_device(device.id, remove_config_entry_id=config_entry.entry_id)
 
 async def async_remove_config_entry_device(
     hass: HomeAssistant, config_entry: ConfigEntry, device_entry: DeviceEntry
@@ -123,7 +220,7 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: OlarmConfigEntry
     # This is called when you remove your integration or shutdown HA.
     # If you have created any custom services, they need to be removed here too.
     if config_entry.runtime_data.webhook_registered:
-        if await unregister_webhook(hass, config_entry.options.get(CONF_WEBHOOK_ID)) :
+        if await unregister_webhook(hass, config_entry.runtime_data.options.get(CONF_WEBHOOK_ID)) :
             config_entry.runtime_data.webhook_registered = False
     # Unload platforms and return result
     return await hass.config_entries.async_unload_platforms(config_entry, _PLATFORMS)
@@ -1,6 +1,8 @@
 """Interfaces with the Integration 101 Template api sensors."""
 
-from enum import StrEnum
+from __future__ import annotations
+
+from dataclasses import asdict
 import logging
 
 from homeassistant.components.alarm_control_panel import (
@@ -12,11 +14,10 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from propcache.api import cached_property
 
 from . import OlarmConfigEntry
-from .const import DOMAIN, ALARM_DEVICE_TO_HASS, AreaConf, AreaState, AreaStatus, DeviceType
-from .coordinator import OlarmCoordinator, AlarmArea, AlarmDevice
+from .const import DOMAIN, ALARM_DEVICE_TO_HASS, ATTR_DATA_AGE, ATTR_RECENT_EVENTS, TIMELINE_ATTRIBUTE_EVENTS, AreaConf, AreaState, OlarmConf
+from .coordinator import OlarmCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,28 +38,44 @@ async def async_setup_entry(
     # This maybe different in your specific case, depending on how your data is structured
     alarm_control_panels = []
 
-    for olarm_config in coordinator.data.olarm_conf_data.values():
-        for area_config in olarm_config.alarm_conf.area_conf:
-            match ALARM_DEVICE_TO_HASS.get(olarm_config.alarm_conf.alarm_make, None):
-                case "IDXControlPanel":
-                    _LOGGER.debug("First entity to setup: %s", area_config.id)
-                    alarm_control_panels.append(OlarmControlledPanel(coordinator, area_config, alarm_device_id=olarm_config.id ,device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")} ))
-                case _:
-                    _LOGGER.warning("Unsupported alarm type %s for device %s",olarm_config.alarm_conf.alarm_make, area_config.id)
-                    alarm_control_panels.append(OlarmControlledPanel(coordinator, area_config, alarm_device_id=olarm_config.id ,device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")} ))
+    for device_coordinator, olarm_config in coordinator.get_device_coordinators():
+        alarm_control_panels.extend(get_device_entities(device_coordinator, olarm_config))
 
     # Create the binary sensors.
-    async_add_entities(alarm_control_panels)
+    async_add_entities(coordinator.async_new_entities(alarm_control_panels))
+
+    @callback
+    def async_add_device(olarm_config: OlarmConf) -> None:
+        """Add the entities of an Olarm device that were not added yet."""
+        async_add_entities(coordinator.async_new_entities(get_device_entities(coordinator.for_device(olarm_config.id), olarm_config)))
+
+    coordinator.entity_adders.append(async_add_device)
+
+
+def get_device_entities(coordinator: OlarmCoordinator, olarm_config: OlarmConf) -> list[OlarmControlledPanel]:
+    """Return the alarm control panels of an Olarm device."""
+    alarm_control_panels = []
+    for area_config in olarm_config.alarm_conf.area_conf:
+        match ALARM_DEVICE_TO_HASS.get(olarm_config.alarm_conf.alarm_make, None):
+            case "IDXControlPanel":
+                _LOGGER.debug("First entity to setup: %s", area_config.id)
+                alarm_control_panels.append(OlarmControlledPanel(coordinator, area_config, alarm_device_id=olarm_config.id ,device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")} ))
+            case _:
+                _LOGGER.warning("Unsupported alarm type %s for device %s",olarm_config.alarm_conf.alarm_make, area_config.id)
+                alarm_control_panels.append(OlarmControlledPanel(coordinator, area_config, alarm_device_id=olarm_config.id ,device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")} ))
+    return alarm_control_panels
 
 
 class OlarmControlledPanel(CoordinatorEntity, AlarmControlPanelEntity):
     """Implementation of a Olarm controlled Panel."""
 
     _attr_has_entity_name = True
+    # The timeline is available from the get_timeline service, keep it out of the recorder
+    _unrecorded_attributes = frozenset({ATTR_RECENT_EVENTS, ATTR_DATA_AGE})
 
     def __init__(self, coordinator: OlarmCoordinator, area_config: AreaConf, alarm_device_id: str, device_identifier=dict[tuple[str,str]]) -> None:
         """Initialise sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(alarm_device_id, area_config.id))
         self.area_state: AreaState | None = None
         self.area_conf: AreaConf = area_config
         self.device_identifier = device_identifier
@@ -95,21 +112,24 @@ class OlarmControlledPanel(CoordinatorEntity, AlarmControlPanelEntity):
     def alarm_state(self) -> AlarmControlPanelState | None:
         """Return the current alarm control panel entity state."""
         if self.area_state is not None:
-            _LOGGER.debug("Get Alarm State: %s", self.area_state.status)
-            match self.area_state.status:
-                case "notready" | "disarm":
-                    return AlarmControlPanelState.DISARMED
-                case "arm":
-                    return AlarmControlPanelState.ARMED_AWAY
-                case "sleep" | "stay" | "partarm1" | "partarm2" | "partarm3" | "partarm4":
-                    return AlarmControlPanelState.ARMED_HOME
-                case "alarm" | "fire" | "emergency":
-                    _LOGGER.debug("Return Alarm State: %s", AlarmControlPanelState.TRIGGERED)
-                    return AlarmControlPanelState.TRIGGERED
-                case "countdown":
-                    return AlarmControlPanelState.PENDING
+            return self.coordinator.get_state_table(self.alarm_device_id).get(self.area_state.status)
         return None
 
+    @property
+    def extra_state_attributes(self) -> dict[str, any]:
+        """Return the recent transitions of the area and the age of its state."""
+        return {
+            ATTR_RECENT_EVENTS: [
+                asdict(entry) for entry in self.coordinator.get_timeline(self.alarm_device_id, "area", self.area_conf.id, TIMELINE_ATTRIBUTE_EVENTS)
+            ],
+            ATTR_DATA_AGE: self.coordinator.get_data_age(self.alarm_device_id),
+        }
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.is_device_available(self.alarm_device_id)
+
     @property
     def supported_features(self) -> AlarmControlPanelEntityFeature:
         """Return the list of supported features."""
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import logging
 
 from enum import StrEnum
@@ -8,7 +10,7 @@ from homeassistant.helpers.device_registry import DeviceInfo, callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import OlarmConfigEntry
-from .const import DOMAIN, ZoneType, ZoneStatus
+from .const import DOMAIN, OlarmConf, ZoneConf, ZoneType
 
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -36,21 +38,31 @@ async def async_setup_entry(
     # to a list for each one.
     # This maybe different in your specific case, depending on how your data is structured
     buttons = []
-    for olarm_config in coordinator.data.olarm_conf_data.values():
-        buttons.extend([
-            BypassButton(
-                coordinator,
-                olarm_device_id=olarm_config.id,
-                zone_id=zone.id,
-                label=zone.label,
-                type=zone.type,
-                device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")}
-            )
-            for zone in olarm_config.alarm_conf.zone_conf
-        ])
+    for device_coordinator, olarm_config in coordinator.get_device_coordinators():
+        buttons.extend(get_device_entities(device_coordinator, olarm_config))
 
     # Create the sensors.
-    async_add_entities(buttons)
+    async_add_entities(coordinator.async_new_entities(buttons))
+
+    @callback
+    def async_add_device(olarm_config: OlarmConf) -> None:
+        """Add the entities of an Olarm device that were not added yet."""
+        async_add_entities(coordinator.async_new_entities(get_device_entities(coordinator.for_device(olarm_config.id), olarm_config)))
+
+    coordinator.entity_adders.append(async_add_device)
+
+
+def get_device_entities(coordinator: OlarmCoordinator, olarm_config: OlarmConf) -> list[BypassButton]:
+    """Return the bypass buttons of an Olarm device."""
+    return [
+        BypassButton(
+            coordinator,
+            olarm_device_id=olarm_config.id,
+            zone_conf=zone,
+            device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")}
+        )
+        for zone in olarm_config.alarm_conf.zone_conf
+    ]
 
 class BypassButton(ButtonEntity, CoordinatorEntity):
     """Representation of a Alarm Zone Bypass Button."""
@@ -59,39 +71,37 @@ class BypassButton(ButtonEntity, CoordinatorEntity):
         self,
         coordinator: OlarmCoordinator,
         olarm_device_id: str,
-        zone_id: str,
-        label: str,
-        type,
+        zone_conf: ZoneConf,
         device_identifier: set[tuple[str, str]],
     ) -> None:
         """Initialize the buttonr."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(olarm_device_id, None))
         self.coordinator = coordinator
         self.olarm_device_id = olarm_device_id
-        self.zone_id = zone_id
-        self.zone_label = label
-        self.type = type
+        self.zone_id = zone_conf.id
+        # Updated in place by the coordinator when the zone is renamed on the panel
+        self.zone_conf = zone_conf
         self.device_identifier = device_identifier
-        self._attr_unique_id = f"{DOMAIN}-{olarm_device_id}-bypass-{zone_id}"
+        self._attr_unique_id = f"{DOMAIN}-{olarm_device_id}-bypass-{zone_conf.id}"
 
     @property
     def name(self) -> str:
         """Return the name of the sensor."""
-        match self.type:
+        match self.zone_conf.type:
             case ZoneType.DOOR:
-                return f"{self.zone_id:0>2} Door - {self.zone_label} - Bypass"
+                return f"{self.zone_id:0>2} Door - {self.zone_conf.label} - Bypass"
             case ZoneType.WINDOW:
-                return f"{self.zone_id:0>2} Window - {self.zone_label} - Bypass"
+                return f"{self.zone_id:0>2} Window - {self.zone_conf.label} - Bypass"
             case ZoneType.PIR_INDOOR:
-                return f"{self.zone_id:0>2} Motion - {self.zone_label} - Bypass"
+                return f"{self.zone_id:0>2} Motion - {self.zone_conf.label} - Bypass"
             case ZoneType.PIR_OUTDOOR:
-                return f"{self.zone_id:0>2} Motion - {self.zone_label} - Bypass"
+                return f"{self.zone_id:0>2} Motion - {self.zone_conf.label} - Bypass"
             case ZoneType.PANIC_BOTTON:
-                return f"{self.zone_id:0>2} Panic - {self.zone_label} - Bypass"
+                return f"{self.zone_id:0>2} Panic - {self.zone_conf.label} - Bypass"
             case ZoneType.PANIC_ZONE:
-                return f"{self.zone_id:0>2} Panic - {self.zone_label} - Bypass"
+                return f"{self.zone_id:0>2} Panic - {self.zone_conf.label} - Bypass"
             case _:
-                return f"{self.zone_id:0>2} Zone - {self.zone_label} - Bypass"
+                return f"{self.zone_id:0>2} Zone - {self.zone_conf.label} - Bypass"
 
 
     async def async_press(self) -> None:
@@ -109,3 +119,8 @@ class BypassButton(ButtonEntity, CoordinatorEntity):
         return DeviceInfo(
             identifiers=self.device_identifier
         )
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.is_device_available(self.olarm_device_id)
@@ -2,10 +2,10 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
-from .helpers import get_entity_configuration
 import voluptuous as vol
 from yarl import URL
 
@@ -19,8 +19,13 @@ from homeassistant.helpers.network import get_url
 from homeassistant.components import webhook
 
 
-from .const import DOMAIN, CONF_WEBHOOK_SECRET, CONF_WEBHOOK_ENABLED, DEFAULT_SCAN_INTERVAL,OlarmConf, AlarmConf, ZoneConf, AreaConf
-from .olarm_api import OlarmAPI, APIAuthError, APIConnectionError, OlarmDevice
+from .const import DOMAIN, CONF_WEBHOOK_SECRET, CONF_WEBHOOK_ENABLED, DEFAULT_SCAN_INTERVAL
+from .const import CONF_TIER_ALARM_INTERVAL, CONF_TIER_ARMED_INTERVAL, CONF_TIER_IDLE_INTERVAL, DEFAULT_TIER_ALARM_INTERVAL, DEFAULT_TIER_IDLE_INTERVAL
+from .const import CONF_STALE_TTL, DEFAULT_STALE_TTL, STALE_TTL_MIN_POLLS
+from .const import CONF_POLL_MODE, CONF_HEDGE_REQUESTS, CONF_SHARDED, PollMode, CONF_WEBHOOK_DEBOUNCE, DEFAULT_WEBHOOK_DEBOUNCE, CONF_RECORD_TRAFFIC
+from .const import ALARM_DEVICE_TO_HASS, ALARM_STATES, CONF_ALARM_MAKE, CONF_STATE_MAP, CONF_ACTION_MAP, ActionId, AreaStatus
+from .helpers import get_action_plan, get_state_map
+from .olarm_api import OlarmAPI, APIAuthError, APIConnectionError
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,10 +42,11 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
     # Validate the data can be used to set up a connection.
+    # Only the device identities are read here, profiles are loaded for the selected devices.
     api = OlarmAPI(data[CONF_API_TOKEN], async_get_clientsession(hass))
     try:
-        api_data = await api.initial_connect()
-        device_data = await get_entity_configuration(api_data['devices'])
+        api_data = await api.get_device_index()
+        device_data = {device.id: device for device in api_data['devices']}
         # If you cannot connect, raise CannotConnect
         # If the authentication is wrong, raise InvalidAuth
     except APIAuthError as err:
@@ -94,6 +100,7 @@ class OptionsFlowHandler(OptionsFlow):
     def __init__(self) -> None:
         """Initialize options flow."""
         self.options = {}
+        self.alarm_make: str | None = None
 
     async def async_step_init(self, user_input=None):
         """Handle options flow.
@@ -105,7 +112,7 @@ class OptionsFlowHandler(OptionsFlow):
 
         return self.async_show_menu(
             step_id="init",
-            menu_options=["select_devices","register_webhook"]
+            menu_options=["select_devices","polling","register_webhook","state_mapping","action_mapping","recording"]
         )
 
     async def async_step_select_devices(self, user_input=None):
@@ -119,17 +126,73 @@ class OptionsFlowHandler(OptionsFlow):
         _LOGGER.debug("select_devices - Config data: %s", config_data)
         _LOGGER.debug("select_devices - Option data: %s", option_data)
 
+        errors: dict[str, str] = {}
         if user_input is not None:
-            option_data = option_data | user_input
-            _LOGGER.debug("select_devices - Updated Option data: %s", option_data)
-            return self.async_create_entry(title="", data=option_data)
+            # Load the full profile of newly selected devices only, to check they can be polled.
+            # A loaded entry keeps them, so they are not fetched again when tracking starts.
+            runtime_data = getattr(self.config_entry, "runtime_data", None)
+            api = runtime_data.coordinator.api if runtime_data is not None else OlarmAPI(config_data[CONF_API_TOKEN], async_get_clientsession(self.hass))
+            selected = [device_id for device_id in config_data["devices"] if user_input.get(device_id) and not option_data.get(device_id)]
+            try:
+                profiles = await asyncio.gather(*(api.get_device(device_id) for device_id in selected))
+            except APIAuthError:
+                errors["base"] = "invalid_auth"
+            except APIConnectionError:
+                errors["base"] = "cannot_connect"
+            else:
+                if None in profiles:
+                    errors["base"] = "cannot_connect"
+                elif runtime_data is not None:
+                    runtime_data.coordinator.prefetched_devices.update(zip(selected, profiles))
+            if not errors:
+                option_data = option_data | user_input
+                _LOGGER.debug("select_devices - Updated Option data: %s", option_data)
+                return self.async_create_entry(title="", data=option_data)
 
         data_schema = vol.Schema(
-            {vol.Optional(device.id, default=option_data.get( device.id ,False)): selector({"boolean" : {}}) for device in config_data["devices"].values()} |
+            {vol.Optional(device_id, default=option_data.get(device_id, False)): selector({"boolean" : {}}) for device_id in config_data["devices"]} |
             {vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): selector({"number" : {"min" : "10", "max" : "60"}})}
         )
 
-        return self.async_show_form(step_id="select_devices", data_schema=data_schema)
+        return self.async_show_form(step_id="select_devices", data_schema=data_schema, errors=errors)
+
+    async def async_step_polling(self, user_input=None):
+        """Handle the polling flow.
+
+        Devices are polled at the period of their tier, based on the state of their areas,
+        either all at once or staggered across the interval.
+        """
+        option_data = self.config_entry.options
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            option_data = option_data | user_input
+            slowest = max(
+                option_data.get(CONF_TIER_ALARM_INTERVAL, DEFAULT_TIER_ALARM_INTERVAL),
+                option_data.get(CONF_TIER_ARMED_INTERVAL, option_data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)),
+                option_data.get(CONF_TIER_IDLE_INTERVAL, DEFAULT_TIER_IDLE_INTERVAL),
+            )
+            # A device would go unavailable between two polls of its tier
+            if option_data.get(CONF_STALE_TTL, DEFAULT_STALE_TTL) < STALE_TTL_MIN_POLLS * slowest:
+                errors[CONF_STALE_TTL] = "stale_ttl_too_short"
+            else:
+                _LOGGER.debug("polling - Updated Option data: %s", option_data)
+                return self.async_create_entry(title="", data=option_data)
+
+        number_selector = selector({"number" : {"min" : "5", "max" : "600", "unit_of_measurement" : "s"}})
+        data_schema = vol.Schema(
+            {
+                vol.Optional(CONF_TIER_ALARM_INTERVAL, default=option_data.get(CONF_TIER_ALARM_INTERVAL, DEFAULT_TIER_ALARM_INTERVAL)): number_selector,
+                vol.Optional(CONF_TIER_ARMED_INTERVAL, default=option_data.get(CONF_TIER_ARMED_INTERVAL, option_data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))): number_selector,
+                vol.Optional(CONF_TIER_IDLE_INTERVAL, default=option_data.get(CONF_TIER_IDLE_INTERVAL, DEFAULT_TIER_IDLE_INTERVAL)): number_selector,
+                vol.Optional(CONF_POLL_MODE, default=option_data.get(CONF_POLL_MODE, PollMode.BATCH)): selector({"select" : {"options" : list(PollMode), "translation_key" : "poll_mode"}}),
+                vol.Optional(CONF_HEDGE_REQUESTS, default=option_data.get(CONF_HEDGE_REQUESTS, False)): selector({"boolean" : {}}),
+                vol.Optional(CONF_STALE_TTL, default=option_data.get(CONF_STALE_TTL, DEFAULT_STALE_TTL)): selector({"number" : {"min" : "30", "max" : "3600", "unit_of_measurement" : "s"}}),
+                vol.Optional(CONF_SHARDED, default=option_data.get(CONF_SHARDED, False)): selector({"boolean" : {}}),
+            }
+        )
+
+        return self.async_show_form(step_id="polling", data_schema=data_schema, errors=errors)
 
     async def async_step_register_webhook(self, user_input=None):
         """Handle menu option 2 flow.
@@ -155,6 +218,7 @@ class OptionsFlowHandler(OptionsFlow):
             {
                 vol.Optional(CONF_WEBHOOK_ENABLED, default=option_data.get(CONF_WEBHOOK_ENABLED,False)): selector({"boolean" : {}}),
                 vol.Optional(CONF_WEBHOOK_SECRET): str,
+                vol.Optional(CONF_WEBHOOK_DEBOUNCE, default=option_data.get(CONF_WEBHOOK_DEBOUNCE, DEFAULT_WEBHOOK_DEBOUNCE)): selector({"number" : {"min" : "0", "max" : "1000", "unit_of_measurement" : "ms"}}),
             }
         )
 
@@ -171,6 +235,109 @@ class OptionsFlowHandler(OptionsFlow):
             },
         )
 
+    async def async_step_state_mapping(self, user_input=None):
+        """Handle the state mapping flow.
+
+        Select the alarm make whose area status mapping to amend.
+        """
+        if user_input is not None:
+            self.alarm_make = user_input[CONF_ALARM_MAKE]
+            return await self.async_step_state_mapping_make()
+
+        return self.async_show_form(step_id="state_mapping", data_schema=self.get_alarm_make_schema())
+
+    async def async_step_state_mapping_make(self, user_input=None):
+        """Handle the state mapping of an alarm make.
+
+        Each raw area status of the alarm make is mapped to a Home Assistant alarm state, the defaults come from the panel type.
+        """
+        option_data = self.config_entry.options
+        state_map = option_data.get(CONF_STATE_MAP, {})
+
+        if user_input is not None:
+            option_data = option_data | {CONF_STATE_MAP: state_map | {self.alarm_make: user_input}}
+            _LOGGER.debug("state_mapping - Updated Option data: %s", option_data)
+            return self.async_create_entry(title="", data=option_data)
+
+        current = get_state_map(self.alarm_make, state_map)
+        state_selector = selector({"select" : {"options" : ALARM_STATES, "translation_key" : "alarm_state"}})
+        data_schema = vol.Schema(
+            {vol.Optional(status.value, default=current.get(status, "disarmed")): state_selector for status in AreaStatus}
+        )
+
+        return self.async_show_form(
+            step_id="state_mapping_make",
+            data_schema=data_schema,
+            description_placeholders={"alarm_make": self.alarm_make},
+        )
+
+    async def async_step_action_mapping(self, user_input=None):
+        """Handle the action mapping flow.
+
+        Select the alarm make whose actions to amend.
+        """
+        if user_input is not None:
+            self.alarm_make = user_input[CONF_ALARM_MAKE]
+            return await self.async_step_action_mapping_make()
+
+        return self.async_show_form(step_id="action_mapping", data_schema=self.get_alarm_make_schema())
+
+    async def async_step_action_mapping_make(self, user_input=None):
+        """Handle the action mapping of an alarm make.
+
+        Each command is mapped to the Olarm action sent to panels of the alarm make, the defaults come from the action map.
+        """
+        option_data = self.config_entry.options
+        action_overrides = option_data.get(CONF_ACTION_MAP, {})
+
+        if user_input is not None:
+            option_data = option_data | {CONF_ACTION_MAP: action_overrides | {self.alarm_make: user_input}}
+            _LOGGER.debug("action_mapping - Updated Option data: %s", option_data)
+            return self.async_create_entry(title="", data=option_data)
+
+        plan = get_action_plan(self.alarm_make, action_overrides)
+        action_selector = selector({"select" : {"options" : list(ActionId)}})
+        data_schema = vol.Schema(
+            {vol.Optional(action.value, default=plan[action].value): action_selector for action in ActionId}
+        )
+
+        return self.async_show_form(
+            step_id="action_mapping_make",
+            data_schema=data_schema,
+            description_placeholders={"alarm_make": self.alarm_make},
+        )
+
+    def get_alarm_make_schema(self) -> vol.Schema:
+        """Return the schema selecting an alarm make, from the loaded devices and the known makes."""
+        alarm_makes = set(ALARM_DEVICE_TO_HASS)
+        if (runtime_data := getattr(self.config_entry, "runtime_data", None)) is not None:
+            alarm_makes.update(conf.alarm_conf.alarm_make for conf in runtime_data.coordinator.get_olarm_conf_data().values())
+        return vol.Schema(
+            {
+                vol.Required(CONF_ALARM_MAKE): selector({"select" : {"options" : sorted(alarm_makes), "custom_value" : True}}),
+            }
+        )
+
+    async def async_step_recording(self, user_input=None):
+        """Handle the traffic recording flow.
+
+        Api and webhook traffic is appended to a file in the config directory for replay.
+        """
+        option_data = self.config_entry.options
+
+        if user_input is not None:
+            option_data = option_data | user_input
+            _LOGGER.debug("recording - Updated Option data: %s", option_data)
+            return self.async_create_entry(title="", data=option_data)
+
+        data_schema = vol.Schema(
+            {
+                vol.Optional(CONF_RECORD_TRAFFIC, default=option_data.get(CONF_RECORD_TRAFFIC, False)): selector({"boolean" : {}}),
+            }
+        )
+
+        return self.async_show_form(step_id="recording", data_schema=data_schema)
+
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
 
@@ -1,7 +1,7 @@
 """Constants for the Olarm Integration integration."""
 
 from enum import StrEnum, IntEnum
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Final
 
 DOMAIN = "olarm_int"
@@ -44,6 +44,37 @@ class AreaStatus(StrEnum):
     FIRE = "fire"
     EMERGENCY = "emergency"
     COUNTDOWN = "countdown"
+    PARTARM1 = "partarm1"
+    PARTARM2 = "partarm2"
+    PARTARM3 = "partarm3"
+    PARTARM4 = "partarm4"
+
+class ZoneCode(StrEnum):
+    """Zone status codes from Olarm API."""
+    ACTIVE = "a"
+    BYPASSED = "b"
+    CLOSED = "c"
+
+class EventSource(StrEnum):
+    """Source of a state change."""
+    POLL = "poll"
+    WEBHOOK = "webhook"
+
+class PollMode(StrEnum):
+    """Polling modes."""
+    BATCH = "batch"
+    STAGGERED = "staggered"
+
+class LoadTestTransport(StrEnum):
+    """How the webhook load test reaches the handler."""
+    IN_PROCESS = "in_process"
+    HTTP = "http"
+
+class PollTier(StrEnum):
+    """Polling tiers, from most to least urgent."""
+    ALARM = "alarm"
+    ARMED = "armed"
+    IDLE = "idle"
 
 
 ### API Data Classes ###
@@ -64,6 +95,7 @@ class AlarmArea:
     status: str | None = None
     trigger_zones: list[int] | None = None
     timestamp: float | None = None
+    zones: list[int] | None = None
 
 @dataclass
 class AlarmDevice:
@@ -89,6 +121,13 @@ class OlarmDevice:
     firmware_version: str | None = None
     alarm_detail: AlarmDevice | None = None
 
+@dataclass
+class OlarmDeviceIndex:
+    """Olarm Device identity, as listed when configuring."""
+    id: str
+    label: str
+    serial_number: str
+
 ### coordinator Data Classes ###
 @dataclass
 class ZoneState:
@@ -119,6 +158,32 @@ class OlarmState:
     timezone: str | None = None
     alarm: AlarmState | None = None
 
+@dataclass(frozen=True, slots=True)
+class TimelineEntry:
+    """Hold a single status change of an area or zone."""
+    status: str | None
+    previous: str | None
+    timestamp: float | None
+    source: str
+
+@dataclass(frozen=True, slots=True)
+class PendingCommand:
+    """Hold a command sent to an area or zone, until its state is seen."""
+    action: str
+    sent: float
+
+@dataclass
+class WebhookMetrics:
+    """Hold the webhook queue metrics."""
+    events: int = 0
+    batches: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    max_queue_depth: int = 0
+    duplicates: int = 0
+    stale: int = 0
+    rejected: int = 0
+
 @dataclass
 class ZoneConf:
     """Hold the config of a zone device."""
@@ -131,6 +196,8 @@ class AreaConf:
     """Hold the config of an alarm area."""
     id: str
     label: str
+    # Read from the area state, so it is kept out of the profile comparison
+    zones: list[int] | None = field(default=None, compare=False)
 
 @dataclass
 class AlarmConf:
@@ -155,22 +222,118 @@ class OlarmConf:
 
 ### Constants for the API ###
 BASE_URL: Final = "https://apiv4.olarm.co/api/v4/"
+DEVICE_PAGE_LENGTH: Final = 50  # devices per page when listing the account
+API_CONCURRENCY: Final = 4  # requests in flight at once, to stay under the api rate limit
+REQUEST_TIMEOUT: Final = 10  # in seconds, for requests outside a polling cycle
+MIN_REQUEST_TIMEOUT: Final = 2  # in seconds, the smallest slice of a cycle budget given to a request
+CYCLE_BUDGET: Final = 0.8  # share of the update interval a polling cycle may take
+HEDGE_PERCENTILE: Final = 95  # device fetches slower than this latency percentile are hedged
+HEDGE_SAMPLES: Final = 100  # device fetch latencies kept for the percentile
+HEDGE_MIN_SAMPLES: Final = 20  # latencies needed before fetches are hedged
+HEDGE_BUDGET: Final = 0.05  # largest share of device fetches that may be hedged
 DEFAULT_SCAN_INTERVAL = 15  # in seconds
+DEFAULT_TIER_ALARM_INTERVAL = 10  # in seconds
+DEFAULT_TIER_IDLE_INTERVAL = 60  # in seconds
+DEFAULT_STALE_TTL = 300  # in seconds, a device not fetched for longer is unavailable
+STALE_TTL_MIN_POLLS: Final = 2  # the staleness ttl spans at least this many polls of the slowest tier
+STAGGER_JITTER: Final = 0.1  # fraction of a device slot
+DEFAULT_WEBHOOK_DEBOUNCE = 50  # in milliseconds
+WEBHOOK_DEDUP_SIZE: Final = 256  # recent event fingerprints kept
+WEBHOOK_BATCH_LIMIT: Final = 100  # events accepted in one webhook body
+TIMELINE_LENGTH: Final = 20  # transitions kept per area or zone
+TIMELINE_DEVICE_EVENTS: Final = 1000  # transitions kept per device
+TIMELINE_ATTRIBUTE_EVENTS: Final = 5  # transitions shown as entity attributes
+TRAFFIC_FILE: Final = "olarm_int_traffic_{entry_id}.jsonl"  # in the config directory
+COMMAND_LATENCY_SAMPLES: Final = 50  # confirmed commands kept per device and action
+COMMAND_TIMEOUT: Final = 300  # in seconds, a command not confirmed by then is dropped
+LOOP_LAG_INTERVAL: Final = 0.05  # in seconds, between event loop lag samples of the load test
 OLARM_DIGEST_ALG: Final = 'sha1'
 OLARM_DIGEST_HEADER: Final = "x-olarm-signature"
 
+### Services ###
+SERVICE_GET_TIMELINE: Final = "get_timeline"
+SERVICE_REPLAY_TRAFFIC: Final = "replay_traffic"
+ATTR_CONFIG_ENTRY_ID: Final = "config_entry_id"
+ATTR_FILE: Final = "file"
+ATTR_SPEED: Final = "speed"
+ATTR_DEVICE_ID: Final = "device_id"
+ATTR_AREA: Final = "area"
+ATTR_ZONE: Final = "zone"
+ATTR_LIMIT: Final = "limit"
+ATTR_RECENT_EVENTS: Final = "recent_events"
+ATTR_COMMAND_LATENCY: Final = "command_latency"
+ATTR_DATA_AGE: Final = "data_age"
+SERVICE_BYPASS_ZONES: Final = "bypass_zones"
+SERVICE_ARM_AREAS: Final = "arm_areas"
+ATTR_ZONES: Final = "zones"
+ATTR_AREAS: Final = "areas"
+ATTR_BYPASS: Final = "bypass"
+ATTR_MODE: Final = "mode"
+AREA_MODES: Final = ["disarm", "arm_away", "arm_home", "arm_night"]
+SERVICE_LOAD_TEST_WEBHOOK: Final = "load_test_webhook"
+ATTR_RATE: Final = "rate"
+ATTR_DURATION: Final = "duration"
+ATTR_TRANSPORT: Final = "transport"
+ATTR_DEVICES: Final = "devices"
+ATTR_AREAS_PER_DEVICE: Final = "areas_per_device"
+ATTR_ZONES_PER_DEVICE: Final = "zones_per_device"
+
+### Events fired on the bus for each area, zone and power change ###
+EVENT_AREA_CHANGED: Final = f"{DOMAIN}_area_changed"
+EVENT_ZONE_CHANGED: Final = f"{DOMAIN}_zone_changed"
+EVENT_POWER_CHANGED: Final = f"{DOMAIN}_power_changed"
+
 ### Constants for config flow ###
 CONF_WEBHOOK_SECRET: Final = "webhook_secret"
+CONF_WEBHOOK_DEBOUNCE: Final = "webhook_debounce"
 
 ### Constants for options flow ###
 CONF_SELECTED: Final = "selected"
 CONF_WEBHOOK_ENABLED: Final = "webhook_enabled"
+CONF_TIER_ALARM_INTERVAL: Final = "tier_alarm_interval"
+CONF_TIER_ARMED_INTERVAL: Final = "tier_armed_interval"
+CONF_TIER_IDLE_INTERVAL: Final = "tier_idle_interval"
+CONF_POLL_MODE: Final = "poll_mode"
+CONF_HEDGE_REQUESTS: Final = "hedge_requests"
+CONF_STALE_TTL: Final = "stale_ttl"
+CONF_SHARDED: Final = "sharded"
+CONF_RECORD_TRAFFIC: Final = "record_traffic"
+CONF_ALARM_MAKE: Final = "alarm_make"
+CONF_STATE_MAP: Final = "state_map"
+CONF_ACTION_MAP: Final = "action_map"
+
+### Options applied without reloading the integration, "scan_interval" and "webhook_id" are the HA constants ###
+INTERVAL_OPTIONS: Final = frozenset({"scan_interval", CONF_TIER_ALARM_INTERVAL, CONF_TIER_ARMED_INTERVAL, CONF_TIER_IDLE_INTERVAL, CONF_POLL_MODE, CONF_HEDGE_REQUESTS})
+HOT_OPTIONS: Final = INTERVAL_OPTIONS | {"webhook_id", CONF_WEBHOOK_ENABLED, CONF_WEBHOOK_SECRET, CONF_WEBHOOK_DEBOUNCE, CONF_RECORD_TRAFFIC, CONF_STATE_MAP, CONF_ACTION_MAP, CONF_STALE_TTL}
+
+### Area statuses that select a device polling tier, anything else is armed ###
+ALARM_TIER_STATUSES: Final = frozenset({AreaStatus.ALARM, AreaStatus.FIRE, AreaStatus.EMERGENCY, AreaStatus.COUNTDOWN})
+IDLE_TIER_STATUSES: Final = frozenset({AreaStatus.DISARMED, AreaStatus.NOT_READY})
 
 ### Map alarm make to HASS device class ###
 ALARM_DEVICE_TO_HASS = {
     "ids_x64": "IDXControlPanel"
     }
 
+### Map raw area status to HASS alarm state per panel class, overridden per alarm make from the options ###
+ALARM_STATES: Final = ["disarmed", "armed_home", "armed_away", "armed_night", "armed_vacation", "armed_custom_bypass", "arming", "pending", "triggered"]
+DEFAULT_STATE_MAP: Final = {
+    AreaStatus.NOT_READY: "disarmed",
+    AreaStatus.DISARMED: "disarmed",
+    AreaStatus.ARMED: "armed_away",
+    AreaStatus.SLEEP: "armed_home",
+    AreaStatus.STAY: "armed_home",
+    AreaStatus.PARTARM1: "armed_home",
+    AreaStatus.PARTARM2: "armed_home",
+    AreaStatus.PARTARM3: "armed_home",
+    AreaStatus.PARTARM4: "armed_home",
+    AreaStatus.ALARM: "triggered",
+    AreaStatus.FIRE: "triggered",
+    AreaStatus.EMERGENCY: "triggered",
+    AreaStatus.COUNTDOWN: "pending",
+}
+PANEL_STATE_MAPS: Final = {"IDXControlPanel": DEFAULT_STATE_MAP}
+
 
 '''
 ["area-disarm", "area-stay", "area-sleep", "area-arm", "area-part-arm-{partNumber}", "zone-bypass", "zone-unbypass"]
@@ -193,6 +356,10 @@ class ActionId(StrEnum):
     AREA_PART_ARM_2 = "area-part-arm-2"
     AREA_PART_ARM_3 = "area-part-arm-3"
     AREA_PART_ARM_4 = "area-part-arm-4"
+    PGM_OPEN = "pgm-open"
+    PGM_CLOSE = "pgm-close"
+    PGM_PULSE = "pgm-pulse"
+    UKEY_ACTIVATE = "ukey-activate"
 
 
 ### Map Olarm api actions to alarm types ###
@@ -200,6 +367,20 @@ action_map = {"ids_x64" : {ActionId.ZONE_UNBYPASS: ActionId.ZONE_BYPASS,
                            ActionId.AREA_STAY: ActionId.AREA_STAY,
                            ActionId.AREA_SLEEP: ActionId.AREA_STAY_2}}
 
+### Area and zone statuses that confirm a command has taken effect, the exit delay counts for arming ###
+_STAY_STATUSES = frozenset({
+    AreaStatus.STAY, AreaStatus.SLEEP, AreaStatus.COUNTDOWN,
+    AreaStatus.PARTARM1, AreaStatus.PARTARM2, AreaStatus.PARTARM3, AreaStatus.PARTARM4,
+})
+COMMAND_CONFIRM_STATUSES: Final = {
+    ActionId.AREA_DISARM: frozenset({AreaStatus.DISARMED, AreaStatus.NOT_READY}),
+    ActionId.AREA_ARM: frozenset({AreaStatus.ARMED, AreaStatus.COUNTDOWN}),
+    ActionId.AREA_STAY: _STAY_STATUSES,
+    ActionId.AREA_SLEEP: _STAY_STATUSES,
+    ActionId.ZONE_BYPASS: frozenset({ZoneCode.BYPASSED}),
+    ActionId.ZONE_UNBYPASS: frozenset({ZoneCode.ACTIVE, ZoneCode.CLOSED}),
+}
+
 
 class WebHookActions(StrEnum):
     """Webhook Actions from Olarm API."""
@@ -213,3 +394,18 @@ class WebHookStates(StrEnum):
     STAYARM2 = "stayarm2"
     STAYARM3 = "stayarm3"
     STAYARM4 = "stayarm4"
+
+### Map webhook area states to raw area status ###
+WEBHOOK_STATE_TO_STATUS: Final = {
+    WebHookStates.DISARMED: AreaStatus.DISARMED,
+    WebHookStates.STAYARM1: AreaStatus.PARTARM1,
+    WebHookStates.STAYARM2: AreaStatus.PARTARM2,
+    WebHookStates.STAYARM3: AreaStatus.PARTARM3,
+    WebHookStates.STAYARM4: AreaStatus.PARTARM4,
+}
+
+### Webhook (action, state) pairs that can change state, other events are rejected on arrival ###
+WEBHOOK_EVENTS: Final = frozenset(
+    {(WebHookActions.ZONE_ALARM, WebHookStates.ALARM)}
+    | {(WebHookActions.AREA, state) for state in WEBHOOK_STATE_TO_STATUS}
+)
@@ -1,23 +1,49 @@
 """DataUpdateCoordinator for Olarm Integration."""
 
-from dataclasses import dataclass
-from datetime import timedelta
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from contextlib import aclosing
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timedelta
+from random import uniform
+from time import monotonic, perf_counter
+from typing import TYPE_CHECKING
+import asyncio
 import json
 import hmac
-from aiohttp import ClientSession
 import logging
 
-from homeassistant.components.device_tracker import config_entry
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_SCAN_INTERVAL, CONF_API_TOKEN, CONF_WEBHOOK_ID
-
-from homeassistant.core import DOMAIN, HomeAssistant
+from homeassistant.components.alarm_control_panel import AlarmControlPanelState
+from homeassistant.const import CONF_SCAN_INTERVAL, CONF_API_TOKEN, CONF_WEBHOOK_ID, Platform
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
-from homeassistant.util.aiohttp import web
 
 from .olarm_api import APIConnectionError, OlarmAPI, APIAuthError, DeviceType, APIActionError
-from .const import DEFAULT_SCAN_INTERVAL, CONF_WEBHOOK_ENABLED, OLARM_DIGEST_HEADER, OLARM_DIGEST_ALG, CONF_WEBHOOK_SECRET, ActionId, WebHookActions, WebHookStates, ZoneState, AreaState, AlarmState, OlarmConf, OlarmState, action_map
-from .helpers import get_entity_configuration
+from .const import CONF_STALE_TTL, DEFAULT_STALE_TTL, STALE_TTL_MIN_POLLS
+from .const import DOMAIN, DEFAULT_SCAN_INTERVAL, CONF_WEBHOOK_ENABLED, OLARM_DIGEST_HEADER, OLARM_DIGEST_ALG, CONF_WEBHOOK_SECRET, ActionId, WebHookActions, WebHookStates, ZoneState, AreaState, AlarmState, OlarmConf, OlarmState
+from .const import CONF_TIER_ALARM_INTERVAL, CONF_TIER_ARMED_INTERVAL, CONF_TIER_IDLE_INTERVAL, DEFAULT_TIER_ALARM_INTERVAL, DEFAULT_TIER_IDLE_INTERVAL, ALARM_TIER_STATUSES, IDLE_TIER_STATUSES, PollTier
+from .const import CONF_POLL_MODE, CONF_HEDGE_REQUESTS, CONF_SHARDED, STAGGER_JITTER, PollMode
+from .const import CONF_WEBHOOK_DEBOUNCE, DEFAULT_WEBHOOK_DEBOUNCE, WEBHOOK_BATCH_LIMIT, WEBHOOK_DEDUP_SIZE, WebhookMetrics
+from .const import TIMELINE_DEVICE_EVENTS, TIMELINE_LENGTH, EventSource, TimelineEntry
+from .const import CONF_RECORD_TRAFFIC, TRAFFIC_FILE
+from .const import EVENT_AREA_CHANGED, EVENT_POWER_CHANGED, EVENT_ZONE_CHANGED
+from .const import AreaStatus, ZoneCode, CONF_ACTION_MAP, CONF_STATE_MAP, WEBHOOK_EVENTS, WEBHOOK_STATE_TO_STATUS
+from .const import API_CONCURRENCY, CYCLE_BUDGET, MIN_REQUEST_TIMEOUT
+from .const import COMMAND_CONFIRM_STATUSES, COMMAND_LATENCY_SAMPLES, COMMAND_TIMEOUT, PendingCommand
+from .helpers import get_action_plan, get_entity_configuration, get_event_fingerprint, get_state_map, parse_event_time, percentile
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from aiohttp import ClientSession, web
+
+    from homeassistant.config_entries import ConfigEntry
+    from homeassistant.helpers.entity import Entity
+
+    from .traffic import TrafficRecorder
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -79,43 +105,271 @@ class OlarmAPIData:
     olarm_state_data: dict[str, OlarmState] | None = None
 
 
+def update_conf(existing, conf):
+    """Copy a zone or area config onto the existing object, if there is one, and return it."""
+    if existing is None:
+        return conf
+    for field in fields(conf):
+        setattr(existing, field.name, getattr(conf, field.name))
+    return existing
+
+
 class OlarmCoordinator(DataUpdateCoordinator):
     """My example coordinator."""
 
     data: OlarmAPIData
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry,  websession: ClientSession) -> None:
-        """Initialize coordinator."""
+    def __init__(
+        self, hass: HomeAssistant, config_entry: ConfigEntry,  websession: ClientSession,
+        hub: OlarmCoordinator | None = None, device_id: str | None = None, isolated: bool = False,
+    ) -> None:
+        """Initialize coordinator.
+
+        A hub coordinator tracks all devices. In sharded mode it also creates one device
+        coordinator per device, given the hub and the device id, that shares its api.
+        An isolated coordinator holds scratch data for replays and load tests, it does not
+        poll, record traffic, fire bus events or change the registries.
+        """
 
         _LOGGER.debug("Init coordinator")
+        # Startup benchmark, seconds since the coordinator was created at the start of setup
+        self._setup_started = perf_counter()
+        self.startup_timings: dict[str, float] = {}
         # Set variables from values entered in config flow setup
         self.last_update_success = None
         self.token = config_entry.data[CONF_API_TOKEN]
-        self.webhook_id = config_entry.options.get(CONF_WEBHOOK_ID, None)
-        self.webhook_enabled = config_entry.options.get(CONF_WEBHOOK_ENABLED, False)
-        self.webhook_secret = config_entry.options.get(CONF_WEBHOOK_SECRET, "")
-        # set variables from options.  You need a default here incase options have not been set
-        self.poll_interval = config_entry.options.get(
-            CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
-        )
+        self.webhook_metrics = WebhookMetrics()
+        self._webhook_queue: asyncio.Queue[list[dict[str, any]]] = asyncio.Queue()
+        self._webhook_consumer: asyncio.Task | None = None
+        # Newest event time applied per (device, area) and the fingerprints of recent events
+        self._area_event_times: dict[tuple[str, int], float] = {}
+        self._recent_events: OrderedDict[tuple, None] = OrderedDict()
+        self.device_tiers: dict[str, PollTier] = {}
+        self._next_poll: dict[str, float] = {}
+        # Areas owning each zone, per device, built from the device profile
+        self.zone_areas: dict[str, dict[int, tuple[int, ...]]] = {}
+        # Recent transitions per device, keyed by ("area" | "zone", id)
+        self.timelines: dict[str, dict[tuple[str, int], deque[TimelineEntry]]] = {}
+        self._staggered_poll: asyncio.Task | None = None
+        # Devices that missed the last cycle deadline, and how often each did
+        self.late_devices: set[str] = set()
+        self.late_counts: dict[str, int] = {}
+        # When each device state was last fetched or updated by a webhook, and the devices past the ttl
+        self.device_updated: dict[str, float] = {}
+        self._stale_devices: set[str] = set()
+        # Platform callbacks adding the entities of a device, and the unique ids of the entities added
+        self.entity_adders: list[Callable[[OlarmConf], None]] = []
+        self.entity_unique_ids: set[str] = set()
+        # Profiles fetched by the options flow for newly selected devices, used when their tracking starts
+        self.prefetched_devices: dict[str, OlarmDevice] = {}
+        # Commands waiting for their state to be seen, and the latency of the last confirmed commands
+        self.pending_commands: dict[str, dict[tuple[str, int], PendingCommand]] = {}
+        self.command_latencies: dict[tuple[str, ActionId], deque[tuple[float, EventSource]]] = {}
+        self.command_timeouts: dict[str, int] = {}
+        # The device of a device coordinator, and the device coordinators of a sharded hub
+        self.device_id = device_id
+        self.isolated = isolated
+        self.sharded: bool = device_id is None and not isolated and config_entry.options.get(CONF_SHARDED, False)
+        self.shards: dict[str, OlarmCoordinator] = {}
+        # Called with the events of each applied webhook batch, to time them
+        self.webhook_applied: Callable[[list[dict[str, any]]], None] | None = None
 
-        self.devices_to_track = [device for device in config_entry.data["devices"].keys() if config_entry.options.get(device, False)]
+        self.apply_options(config_entry)
 
         # Initialise DataUpdateCoordinator
         super().__init__(
             hass,
             _LOGGER,
-            name=f"{DOMAIN} ({config_entry.unique_id})",
+            config_entry=config_entry,
+            name=f"{DOMAIN} ({config_entry.unique_id})" if device_id is None else f"{DOMAIN} ({config_entry.unique_id} {device_id})",
             # Method to call on every update interval.
             update_method=self.async_update_data,
             # Polling interval. Will only be polled if there are subscribers.
-            # Using config option here but you can just use a value.
-            update_interval=timedelta(seconds=self.poll_interval),
+            # The coordinator ticks at the fastest tier, devices not due on a tick are skipped.
+            # A sharded hub does not poll, each device coordinator ticks on its own.
+            update_interval=None if self.sharded or isolated else timedelta(seconds=min(self.tier_intervals.values())),
+            # Ticks that poll no device return the same data and do not wake the entities.
+            always_update=False,
         )
 
+        if hub is not None:
+            # Device coordinators share the api, webhook metrics and entity bookkeeping of the hub
+            self.api = hub.api
+            self.traffic_recorder = None
+            self.startup_timings = hub.startup_timings
+            self.webhook_metrics = hub.webhook_metrics
+            self.entity_adders = hub.entity_adders
+            self.entity_unique_ids = hub.entity_unique_ids
+            return
+
         # Initialise your api here
         self.api = OlarmAPI(self.token, websession)
 
+        # Optionally record api and webhook traffic for offline replay
+        self.traffic_recorder: TrafficRecorder | None = None
+        self.set_traffic_recording(config_entry.options.get(CONF_RECORD_TRAFFIC, False))
+        # Hedges of replayed requests would take the recorded responses of later ones
+        self.api.hedging = config_entry.options.get(CONF_HEDGE_REQUESTS, False) and not isolated
+
+        if self.sharded:
+            for device_id in self.devices_to_track:
+                self.add_shard(device_id)
+            # A device coordinator without data has no entities listening, so nothing else schedules it
+            config_entry.async_on_unload(
+                async_track_time_interval(hass, self.async_retry_shards, timedelta(seconds=min(self.tier_intervals.values())))
+            )
+
+    def apply_options(self, config_entry: ConfigEntry) -> None:
+        """Read the settings that come from the options flow."""
+        options = config_entry.options
+        self.webhook_id = options.get(CONF_WEBHOOK_ID, None)
+        self.webhook_enabled = options.get(CONF_WEBHOOK_ENABLED, False)
+        self.webhook_secret = options.get(CONF_WEBHOOK_SECRET, "")
+        # Webhook events are queued and applied in batches once the debounce window (ms) closes
+        self.webhook_debounce = options.get(CONF_WEBHOOK_DEBOUNCE, DEFAULT_WEBHOOK_DEBOUNCE)
+        # set variables from options.  You need a default here incase options have not been set
+        self.poll_interval = options.get(
+            CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+        )
+
+        # Each device is polled at the period of its tier, the armed tier defaults to the scan interval
+        self.tier_intervals: dict[PollTier, float] = {
+            PollTier.ALARM: options.get(CONF_TIER_ALARM_INTERVAL, DEFAULT_TIER_ALARM_INTERVAL),
+            PollTier.ARMED: options.get(CONF_TIER_ARMED_INTERVAL, self.poll_interval),
+            PollTier.IDLE: options.get(CONF_TIER_IDLE_INTERVAL, DEFAULT_TIER_IDLE_INTERVAL),
+        }
+        self.poll_mode = options.get(CONF_POLL_MODE, PollMode.BATCH)
+        # The last known state is served until it is older than the staleness ttl, a device is
+        # never stale just because its tier polls it less often
+        self.stale_ttl = max(options.get(CONF_STALE_TTL, DEFAULT_STALE_TTL), STALE_TTL_MIN_POLLS * max(self.tier_intervals.values()))
+
+        self.devices_to_track = [device for device in config_entry.data["devices"].keys() if options.get(device, False)]
+        if self.device_id is not None:
+            self.devices_to_track = [self.device_id]
+        # Webhook events are only admitted for these devices
+        self.webhook_devices: frozenset[str] = frozenset(self.devices_to_track)
+
+        # Area status translation tables per device, compiled on first use and shared by devices of the same make
+        self.state_map: dict[str, dict[str, str]] = options.get(CONF_STATE_MAP, {})
+        self.state_tables: dict[str, dict[str, AlarmControlPanelState]] = {}
+        # Actions sent for each command per device, resolved when the device profile loads
+        self.action_overrides: dict[str, dict[str, str]] = options.get(CONF_ACTION_MAP, {})
+        self.action_plans: dict[str, dict[ActionId, ActionId]] = {}
+
+    def set_traffic_recording(self, enabled: bool) -> None:
+        """Start or stop recording the api and webhook traffic."""
+        if self.device_id is not None or self.isolated:
+            # The hub records for its device coordinators, replays and load tests are not recorded
+            return
+        if not enabled:
+            self.traffic_recorder = None
+            self.api.recorder = None
+        elif self.traffic_recorder is None:
+            from .traffic import TrafficRecorder
+
+            self.traffic_recorder = TrafficRecorder(self.hass, self.hass.config.path(TRAFFIC_FILE.format(entry_id=self.config_entry.entry_id)))
+            self.api.recorder = self.traffic_recorder.record
+
+    @callback
+    def async_apply_options(self, config_entry: ConfigEntry) -> tuple[list[str], list[str]]:
+        """Apply changed options without a reload, return the devices to start and stop tracking."""
+        tracked = self.devices_to_track
+        self.apply_options(config_entry)
+        self.set_traffic_recording(config_entry.options.get(CONF_RECORD_TRAFFIC, False))
+        self.api.hedging = config_entry.options.get(CONF_HEDGE_REQUESTS, False)
+        if not self.sharded:
+            self.update_interval = timedelta(seconds=min(self.tier_intervals.values()))
+        # A device coordinator whose first refresh failed has no data yet
+        for device_id, olarm_conf in (self.data.olarm_conf_data if self.data is not None else {}).items():
+            self.action_plans[device_id] = get_action_plan(olarm_conf.alarm_conf.alarm_make, self.action_overrides)
+        for shard in self.shards.values():
+            shard.async_apply_options(config_entry)
+        added = [device for device in self.devices_to_track if device not in tracked]
+        removed = [device for device in tracked if device not in self.devices_to_track]
+        return added, removed
+
+    async def async_add_tracked_device(self, device_id: str) -> OlarmConf | None:
+        """Fetch a newly tracked device into the data, return its config."""
+        device = self.prefetched_devices.pop(device_id, None)
+        if self.sharded:
+            shard = self.add_shard(device_id)
+            if device is None:
+                await shard.async_refresh()
+            else:
+                shard.data = OlarmAPIData(self.api.controller_name, {}, {})
+                await shard.merge_device_data(shard.data, [device])
+            return shard.get_olarm_conf_data().get(device_id) if shard.data is not None else None
+        if device is None:
+            device = await self.api.get_device(device_id)
+        if device is None:
+            return None
+        await self.merge_device_data(self.data, [device])
+        return self.data.olarm_conf_data[device_id]
+
+    @callback
+    def async_remove_tracked_device(self, device_id: str) -> None:
+        """Drop the data of a device that is no longer tracked."""
+        if (shard := self.shards.pop(device_id, None)) is not None:
+            self.config_entry.async_create_background_task(self.hass, shard.async_shutdown(), f"{shard.name} shutdown")
+            return
+        self.data.olarm_conf_data.pop(device_id, None)
+        self.data.olarm_state_data.pop(device_id, None)
+        for lookup in (self.device_tiers, self._next_poll, self.zone_areas, self.timelines, self.pending_commands, self.action_plans, self.state_tables, self.device_updated):
+            lookup.pop(device_id, None)
+        for key in [key for key in self._area_event_times if key[0] == device_id]:
+            del self._area_event_times[key]
+
+    def add_shard(self, device_id: str) -> OlarmCoordinator:
+        """Create the device coordinator of a device."""
+        shard = OlarmCoordinator(self.hass, self.config_entry, self.api.session, hub=self, device_id=device_id)
+        self.shards[device_id] = shard
+        return shard
+
+    def for_device(self, device_id: str) -> OlarmCoordinator:
+        """Return the coordinator holding the data of a device, its device coordinator when sharded."""
+        return self.shards.get(device_id, self)
+
+    def get_device_coordinators(self) -> list[tuple[OlarmCoordinator, OlarmConf]]:
+        """Return the config of each device with the coordinator its entities subscribe to."""
+        return [(self.for_device(device_id), olarm_conf) for device_id, olarm_conf in self.get_olarm_conf_data().items()]
+
+    async def async_refresh_shards(self) -> OlarmAPIData:
+        """Refresh the device coordinators without data yet, return the data of all of them."""
+        new = self.get_shards_without_data()
+        await asyncio.gather(*(shard.async_refresh() for shard in new))
+        if new and not any(shard.last_update_success for shard in new):
+            raise UpdateFailed("Error communicating with API")
+        shards = [shard for shard in self.shards.values() if shard.data is not None]
+        return OlarmAPIData(
+            self.api.controller_name,
+            {device_id: conf for shard in shards for device_id, conf in shard.data.olarm_conf_data.items()},
+            {device_id: state for shard in shards for device_id, state in shard.data.olarm_state_data.items()},
+        )
+
+    def get_shards_without_data(self) -> list[OlarmCoordinator]:
+        """Return the device coordinators that hold no state of their device yet."""
+        return [shard for shard in self.shards.values() if shard.data is None or shard.device_id not in shard.data.olarm_state_data]
+
+    async def async_retry_shards(self, now: datetime | None = None) -> None:
+        """Refresh the hub while a device coordinator has no data, adding its entities once it has."""
+        if self.data is not None and self.get_shards_without_data():
+            await self.async_refresh()
+
+    async def async_shutdown(self) -> None:
+        """Stop the webhook queue and background poll with the scheduled refreshes, and the device coordinators."""
+        for task in (self._webhook_consumer, self._staggered_poll):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(*(shard.async_shutdown() for shard in self.shards.values()))
+        await super().async_shutdown()
+
+    @callback
+    def async_new_entities(self, entities: list[Entity]) -> list[Entity]:
+        """Return the entities that were not added yet, marking them as added."""
+        entities = [entity for entity in entities if entity.unique_id not in self.entity_unique_ids]
+        self.entity_unique_ids.update(entity.unique_id for entity in entities)
+        return entities
+
 
     async def async_update_data(self):
         """Fetch data from API endpoint.
@@ -124,16 +378,31 @@ class OlarmCoordinator(DataUpdateCoordinator):
         so entities can quickly look up their data.
         """
         _LOGGER.debug("coordinator - Update data")
+        self.async_update_stale_devices()
         try:
             if len(self.devices_to_track) == 0:
-                # call api to at least confirm connection
-                await self.api.get_all_devices()
+                # call api to at least confirm connection, the first device is enough
+                async with aclosing(self.api.iter_device_data(page_length=1)) as devices:
+                    async for _ in devices:
+                        break
                 device_data = []
+            elif self.sharded:
+                return await self.async_refresh_shards()
             else:
-                device_data = [await self.api.get_device(device) for device in self.devices_to_track]
+                devices_due = self.get_devices_due()
+                if self.data is not None and len(devices_due) == 0:
+                    _LOGGER.debug("coordinator - No devices due for polling")
+                    return self.data
+                if self.data is not None and self.poll_mode == PollMode.STAGGERED:
+                    # Devices are merged and their entities notified as each fetch completes
+                    self.async_start_staggered_poll(devices_due)
+                    return self.data
+                device_data = await self.fetch_devices(devices_due)
         except APIAuthError as err:
             _LOGGER.error(err)
             raise UpdateFailed(err) from err
+        except UpdateFailed:
+            raise
         except Exception as err:
             # This will show entities as unavailable by raising UpdateFailed exception
             raise UpdateFailed(f"Error communicating with API: {err}") from err
@@ -142,14 +411,332 @@ class OlarmCoordinator(DataUpdateCoordinator):
         _LOGGER.debug(device_data)
         _LOGGER.debug("coordinator - Translate data")
 
-        ### New
-        olarm_state_data = await self.get_olarm_state_data(device_data)
-        olarm_conf_data = await get_entity_configuration(device_data)
+        ### Devices not polled this tick keep their previous data
+        olarm_data = OlarmAPIData(
+            self.api.controller_name,
+            dict(self.data.olarm_conf_data) if self.data is not None else {},
+            dict(self.data.olarm_state_data) if self.data is not None else {},
+        )
+        await self.merge_device_data(olarm_data, device_data)
 
         self.last_update_success = True
 
         # What is returned here is stored in self.data by the DataUpdateCoordinator
-        return OlarmAPIData(self.api.controller_name, olarm_conf_data, olarm_state_data)
+        return olarm_data
+
+    async def fetch_devices(self, devices: list[str]) -> list[OlarmDevice]:
+        """Fetch devices concurrently within the deadline of the cycle.
+
+        Each request gets a slice of the budget, devices that miss the deadline or fail keep
+        their previous state and are marked late, so they are due again on the next tick.
+        """
+        budget = self.update_interval.total_seconds() * CYCLE_BUDGET
+        request_timeout = max(MIN_REQUEST_TIMEOUT, budget * API_CONCURRENCY / max(len(devices), API_CONCURRENCY))
+        tasks = {asyncio.create_task(self.api.get_device(device, timeout=request_timeout)): device for device in devices}
+        done, pending = await asyncio.wait(tasks, timeout=budget)
+        for task in pending:
+            task.cancel()
+
+        self.late_devices = {tasks[task] for task in pending}
+        device_data = []
+        errors = []
+        for task in done:
+            try:
+                device = task.result()
+            except APIAuthError:
+                raise
+            except APIConnectionError as err:
+                _LOGGER.warning("coordinator - Fetch of device %s failed: %s", tasks[task], err)
+                self.late_devices.add(tasks[task])
+                errors.append(err)
+                continue
+            if device is not None:
+                device_data.append(device)
+
+        for device in self.late_devices:
+            self.late_counts[device] = self.late_counts.get(device, 0) + 1
+        if pending:
+            _LOGGER.warning("coordinator - Devices %s missed the %.1fs deadline", sorted(tasks[task] for task in pending), budget)
+        if errors and len(errors) == len(devices):
+            # Nothing was delivered, report the cycle as failed
+            raise APIConnectionError(errors[0])
+        return device_data
+
+    async def merge_device_data(self, olarm_data: OlarmAPIData, device_data: list) -> None:
+        """Merge polled devices into the api data and schedule their next poll."""
+        new_devices: list[OlarmConf] = []
+        for device_id, olarm_conf in (await get_entity_configuration(device_data)).items():
+            previous_conf = olarm_data.olarm_conf_data.get(device_id)
+            if previous_conf is None:
+                new_devices.append(olarm_conf)
+            if previous_conf is not None and previous_conf != olarm_conf and not self.isolated:
+                olarm_conf = self.async_update_profile(device_id, previous_conf, olarm_conf)
+            if previous_conf != olarm_conf or device_id not in self.action_plans:
+                self.action_plans[device_id] = get_action_plan(olarm_conf.alarm_conf.alarm_make, self.action_overrides)
+            if previous_conf != olarm_conf or device_id not in self.zone_areas:
+                self.zone_areas[device_id] = self.get_zone_area_index(olarm_conf)
+                self.resize_timelines(device_id, olarm_conf)
+            elif (zone_areas := self.get_zone_area_index(olarm_conf)) != self.zone_areas[device_id]:
+                # Zone membership is not a profile change, only the index follows it
+                self.zone_areas[device_id] = zone_areas
+            olarm_data.olarm_conf_data[device_id] = olarm_conf
+
+        for device_id, olarm_state in (await self.get_olarm_state_data(device_data)).items():
+            previous = olarm_data.olarm_state_data.get(device_id)
+            if previous is not None:
+                self.record_state_transitions(device_id, previous, olarm_state, EventSource.POLL)
+            olarm_data.olarm_state_data[device_id] = olarm_state
+            self.device_updated[device_id] = monotonic()
+            self.seed_area_event_times(device_id, olarm_state)
+            self.observe_commands(device_id, olarm_state, EventSource.POLL)
+
+        now = monotonic()
+        for device in device_data:
+            self.device_tiers[device.id] = self.get_device_poll_tier(olarm_data.olarm_state_data[device.id])
+            self._next_poll[device.id] = now + self.tier_intervals[self.device_tiers[device.id]]
+        if self.device_id in self.device_tiers:
+            # A device coordinator ticks at the period of its device's tier
+            self.update_interval = timedelta(seconds=self.tier_intervals[self.device_tiers[self.device_id]])
+        if new_devices and self.entity_adders:
+            # Devices that missed the first refresh are added once the platforms are set up,
+            # after the data holding them is stored
+            self.hass.loop.call_soon(self.async_add_devices, new_devices)
+
+    @callback
+    def async_add_devices(self, olarm_confs: list[OlarmConf]) -> None:
+        """Register devices that appeared after setup and add their entities."""
+        from . import async_register_devices
+
+        async_register_devices(self.hass, self.config_entry, self.api.controller_name, olarm_confs)
+        for olarm_conf in olarm_confs:
+            for async_add_device in self.entity_adders:
+                async_add_device(olarm_conf)
+
+    @callback
+    def async_update_profile(self, device_id: str, previous: OlarmConf, olarm_conf: OlarmConf) -> OlarmConf:
+        """Carry a changed device profile over to the entities, return the profile to keep.
+
+        Zones and areas that remain keep their config objects, updated in place so their
+        entities show the new labels. New ones are added through the platforms and removed
+        ones are dropped from the registries.
+        """
+        _LOGGER.debug("Profile of device %s changed", device_id)
+        zones = {zone.id: zone for zone in previous.alarm_conf.zone_conf or []}
+        areas = {area.id: area for area in previous.alarm_conf.area_conf or []}
+        added = any(zone.id not in zones for zone in olarm_conf.alarm_conf.zone_conf or []) or any(
+            area.id not in areas for area in olarm_conf.alarm_conf.area_conf or []
+        )
+        olarm_conf.alarm_conf.zone_conf = [update_conf(zones.pop(zone.id, None), zone) for zone in olarm_conf.alarm_conf.zone_conf or []]
+        olarm_conf.alarm_conf.area_conf = [update_conf(areas.pop(area.id, None), area) for area in olarm_conf.alarm_conf.area_conf or []]
+
+        # What is left over was removed from the panel
+        entity_registry = er.async_get(self.hass)
+        removed = [(Platform.ALARM_CONTROL_PANEL, f"{DOMAIN}-{device_id}-Area-{area_id}") for area_id in areas]
+        removed += [
+            (platform, f"{DOMAIN}-{device_id}-{kind}-{zone_id}")
+            for zone_id in zones
+            for platform, kind in ((Platform.SENSOR, "Sensor"), (Platform.BUTTON, "bypass"))
+        ]
+        for platform, unique_id in removed:
+            self.entity_unique_ids.discard(unique_id)
+            if (entity_id := entity_registry.async_get_entity_id(platform, DOMAIN, unique_id)) is not None:
+                entity_registry.async_remove(entity_id)
+        device_registry = dr.async_get(self.hass)
+        for zone_id in zones:
+            identifier = (DOMAIN, f"{self.data.controller_name}-alarm_system-{previous.alarm_conf.id}-zonesensor-{zone_id}")
+            if (device := device_registry.async_get_device(identifiers={identifier})) is not None:
+                device_registry.async_update_device(device.id, remove_config_entry_id=self.config_entry.entry_id)
+
+        if added:
+            for async_add_device in self.entity_adders:
+                async_add_device(olarm_conf)
+        # Write the renamed zones and areas now, the profile alone may not change the data compared
+        self.async_update_device_listeners(device_id)
+        return olarm_conf
+
+    def resize_timelines(self, device_id: str, olarm_conf: OlarmConf) -> None:
+        """Size the timelines of a device so it holds at most TIMELINE_DEVICE_EVENTS entries."""
+        keys = [("area", area.id) for area in olarm_conf.alarm_conf.area_conf] + [("zone", zone.id) for zone in olarm_conf.alarm_conf.zone_conf]
+        maxlen = max(1, min(TIMELINE_LENGTH, TIMELINE_DEVICE_EVENTS // max(len(keys), 1)))
+        timelines = self.timelines.get(device_id, {})
+        self.timelines[device_id] = {key: deque(timelines.get(key, ()), maxlen=maxlen) for key in keys}
+
+    def record_state_transitions(self, device_id: str, previous: OlarmState, current: OlarmState, source: EventSource) -> None:
+        """Record the area, zone and power status changes between two states of a device."""
+        for power in ("battery_ok", "ac_ok"):
+            old, new = getattr(previous.alarm, power), getattr(current.alarm, power)
+            if old != new:
+                self.async_fire_event(EVENT_POWER_CHANGED, {
+                    "device_id": device_id, "power": power, "old": old, "new": new, "source": source,
+                })
+        for area_id, area in current.alarm.areas.items():
+            previous_area = previous.alarm.areas.get(area_id)
+            if previous_area is not None:
+                self.record_transition(device_id, "area", area_id, previous_area.status, area.status, area.timestamp, source)
+        for zone_id, zone in current.alarm.zones.items():
+            previous_zone = previous.alarm.zones.get(zone_id)
+            if previous_zone is not None:
+                self.record_transition(device_id, "zone", zone_id, previous_zone.status, zone.status, zone.timestamp, source)
+
+    @callback
+    def async_fire_event(self, event_type: str, event_data: dict[str, any]) -> None:
+        """Fire a change event on the bus, unless the data is a replay or load test."""
+        if not self.isolated:
+            self.hass.bus.async_fire(event_type, event_data)
+
+    def record_transition(self, device_id: str, kind: str, item_id: int, previous: str | None, status: str | None, timestamp: any, source: EventSource) -> None:
+        """Add a status change of an area or zone to its timeline and fire it on the bus."""
+        if previous == status:
+            return
+        self.async_fire_event(EVENT_AREA_CHANGED if kind == "area" else EVENT_ZONE_CHANGED, {
+            "device_id": device_id, kind: item_id, "old": previous, "new": status, "timestamp": timestamp, "source": source,
+        })
+        timeline = self.timelines.get(device_id, {}).get((kind, item_id))
+        if timeline is not None:
+            timeline.append(TimelineEntry(status, previous, timestamp, source))
+
+    def track_command(self, device_id: str, action: ActionId, kind: str, item_id: int) -> None:
+        """Start timing a command until its area or zone is seen in the expected state."""
+        self.pending_commands.setdefault(device_id, {})[(kind, item_id)] = PendingCommand(action, monotonic())
+
+    def observe_commands(self, device_id: str, olarm_state: OlarmState, source: EventSource) -> None:
+        """Record the latency of the pending commands of a device its state now confirms."""
+        pending = self.pending_commands.get(device_id)
+        if not pending:
+            return
+        now = monotonic()
+        for (kind, item_id), command in list(pending.items()):
+            items = olarm_state.alarm.areas if kind == "area" else olarm_state.alarm.zones
+            # Webhooks carry no zone states, only the optimistic write of the bypass, so zones are confirmed by polls
+            confirmable = kind == "area" or source == EventSource.POLL
+            if confirmable and item_id in items and items[item_id].status in COMMAND_CONFIRM_STATUSES[command.action]:
+                latencies = self.command_latencies.setdefault((device_id, command.action), deque(maxlen=COMMAND_LATENCY_SAMPLES))
+                latencies.append((now - command.sent, source))
+            elif now - command.sent < COMMAND_TIMEOUT:
+                continue
+            else:
+                self.command_timeouts[device_id] = self.command_timeouts.get(device_id, 0) + 1
+            del pending[(kind, item_id)]
+
+    def get_command_latency(self, device_id: str | None = None) -> dict[str, dict[str, dict[str, any]]]:
+        """Return the command latency percentiles in seconds, per device and action."""
+        latency: dict[str, dict[str, dict[str, any]]] = {}
+        for (device, action), samples in self.command_latencies.items():
+            if device_id is not None and device != device_id:
+                continue
+            durations = [duration for duration, _ in samples]
+            latency.setdefault(device, {})[action] = {
+                "count": len(durations),
+                "p50": percentile(durations, 50),
+                "p95": percentile(durations, 95),
+                "max": max(durations),
+                "webhook": sum(source == EventSource.WEBHOOK for _, source in samples),
+            }
+        return latency
+
+    def get_timeline(self, device_id: str, kind: str, item_id: int, limit: int | None = None) -> list[TimelineEntry]:
+        """Return the most recent transitions of an area or zone, newest first."""
+        timeline = self.timelines.get(device_id, {}).get((kind, item_id), ())
+        return list(reversed(timeline))[:limit]
+
+    def get_zone_area_index(self, olarm_conf: OlarmConf) -> dict[int, tuple[int, ...]]:
+        """Return the areas each zone of a device belongs to."""
+        zone_areas: dict[int, list[int]] = {}
+        for area_conf in olarm_conf.alarm_conf.area_conf:
+            for zone_id in area_conf.zones or []:
+                zone_areas.setdefault(zone_id, []).append(area_conf.id)
+        return {zone_id: tuple(area_ids) for zone_id, area_ids in zone_areas.items()}
+
+    @callback
+    def async_start_staggered_poll(self, devices: list[str]) -> None:
+        """Start fetching the devices spread evenly across the tick."""
+        if self._staggered_poll is not None and not self._staggered_poll.done():
+            _LOGGER.debug("coordinator - Previous staggered poll still running, skipping tick")
+            return
+        self._staggered_poll = self.config_entry.async_create_background_task(
+            self.hass, self.async_staggered_poll(devices), f"{self.name} staggered poll"
+        )
+
+    async def async_staggered_poll(self, devices: list[str]) -> None:
+        """Fetch each device in its own slot of the tick, merging it as it arrives."""
+        slot = self.update_interval.total_seconds() / len(devices)
+        start = monotonic()
+        for index, device_id in enumerate(devices):
+            delay = start + index * slot + uniform(0, slot * STAGGER_JITTER) - monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                device = await self.api.get_device(device_id, timeout=max(MIN_REQUEST_TIMEOUT, slot))
+            except Exception as err:
+                _LOGGER.error("coordinator - Staggered poll of device %s failed: %s", device_id, err)
+                continue
+            if device is None:
+                continue
+            await self.merge_device_data(self.data, [device])
+            self.async_update_device_listeners(device_id)
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE, context: any = None) -> CALLBACK_TYPE:
+        """Listen for data updates, recording when the first entity subscribed."""
+        self.startup_timings.setdefault("first_entity", perf_counter() - self._setup_started)
+        return super().async_add_listener(update_callback, context)
+
+    @callback
+    def async_mark_startup(self, milestone: str) -> None:
+        """Record the time a setup milestone was reached."""
+        self.startup_timings[milestone] = perf_counter() - self._setup_started
+
+    @callback
+    def async_update_device_listeners(self, device_id: str, area_ids: set[int] | None = None) -> None:
+        """Update only the entities of a device, or of some of its areas.
+
+        Entity listener contexts are (device id, area id), with no area id for device level entities.
+        """
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or context[0] != device_id:
+                continue
+            if area_ids is None or context[1] in area_ids:
+                update_callback()
+
+    def get_data_age(self, device_id: str) -> float | None:
+        """Return the seconds since the state of a device was last fetched or updated by a webhook."""
+        if (updated := self.device_updated.get(device_id)) is None:
+            return None
+        return round(monotonic() - updated, 1)
+
+    def is_device_available(self, device_id: str) -> bool:
+        """Return if the last known state of a device is younger than the staleness ttl."""
+        age = self.get_data_age(device_id)
+        return age is not None and age <= self.stale_ttl
+
+    @callback
+    def async_update_stale_devices(self) -> None:
+        """Update the entities of devices whose state just became stale, or fresh again."""
+        stale = {device_id for device_id in self.device_updated if not self.is_device_available(device_id)}
+        for device_id in stale ^ self._stale_devices:
+            self.async_update_device_listeners(device_id)
+        self._stale_devices = stale
+
+    def get_devices_due(self) -> list[str]:
+        """Return the tracked devices whose tier period has elapsed."""
+        # Round to the nearest tick, a device due half a tick from now is polled on this tick
+        threshold = monotonic() + self.update_interval.total_seconds() / 2
+        return [device for device in self.devices_to_track if self._next_poll.get(device, 0) <= threshold]
+
+    def get_device_poll_tier(self, olarm_state: OlarmState) -> PollTier:
+        """Return the polling tier for a device from the status of its areas."""
+        statuses = {area.status for area in olarm_state.alarm.areas.values()}
+        if statuses & ALARM_TIER_STATUSES:
+            return PollTier.ALARM
+        if statuses - IDLE_TIER_STATUSES:
+            return PollTier.ARMED
+        return PollTier.IDLE
+
+    def reschedule_device(self, device_id: str) -> None:
+        """Bring the next poll forward if the device moved to a faster tier."""
+        tier = self.get_device_poll_tier(self.data.olarm_state_data[device_id])
+        self.device_tiers[device_id] = tier
+        self._next_poll[device_id] = min(self._next_poll.get(device_id, 0), monotonic() + self.tier_intervals[tier])
 
     async def get_olarm_state_data(self, olarm_devices = dict[str,OlarmDevice]) -> list[OlarmState]:
         # Return a list of entity configuration data
@@ -187,6 +774,17 @@ class OlarmCoordinator(DataUpdateCoordinator):
                 return None
         return None
 
+    def get_state_table(self, device: str) -> dict[str, AlarmControlPanelState]:
+        """Return the table translating the raw area statuses of a device to alarm states."""
+        if (table := self.state_tables.get(device)) is not None:
+            return table
+        alarm_make = self.get_alarm_make_by_id(device)
+        table = next((self.state_tables[other] for other in self.state_tables if self.get_alarm_make_by_id(other) == alarm_make), None)
+        if table is None:
+            table = {status: AlarmControlPanelState(state) for status, state in get_state_map(alarm_make, self.state_map).items()}
+        self.state_tables[device] = table
+        return table
+
     def get_alarm_make_by_id(
         self, device: str) -> str:
         """Return device by device id."""
@@ -214,95 +812,96 @@ class OlarmCoordinator(DataUpdateCoordinator):
         _LOGGER.debug("coordinator - Toggle bypass Zone:%s on device %s", zone, device)
         match self.get_zone_status_by_id(device, zone):
             case "b":
-                try:
-                    action : ActionId = action_map["ids_x64"][ActionId.ZONE_UNBYPASS]
-                except KeyError:
-                    action = ActionId.ZONE_UNBYPASS
-                try:
-                    result = await self.api.send_action(device, action, zone)
-                    if result:
-                        self.data.olarm_state_data[device].alarm.zones[zone].status = "c"
-                except (APIAuthError, APIConnectionError, APIActionError) as err:
-                    _LOGGER.error("coordinator - Unable to remove bypass on %s Zone %s", device, zone)
-                    _LOGGER.error(err)
+                if not await self.send_zone_bypass(device, zone, False):
                     return False
             case "a" | "c":
-                try:
-                    action : ActionId = action_map["ids_x64"][ActionId.ZONE_BYPASS]
-                except KeyError:
-                    action = ActionId.ZONE_BYPASS
-                try:
-                    result = await self.api.send_action(device, action, zone)
-                    if result:
-                        self.data.olarm_state_data[device].alarm.zones[zone].status = "c"
-                except (APIAuthError, APIConnectionError, APIActionError) as err:
-                    _LOGGER.error("coordinator - Unable to bypass %s Zone %s", device, zone)
-                    _LOGGER.error(err)
+                if not await self.send_zone_bypass(device, zone, True):
                     return False
         self.async_update_listeners()
         return True
 
-    async def area_arm_away(self, device : str, area : int) -> bool:
-        """Arm a area"""
-        _LOGGER.debug("coordinator - Toggle Arm Area:%s on device %s", area, device)
-        try:
-            action : ActionId = action_map["ids_x64"][ActionId.AREA_ARM]
-        except KeyError:
-                action = ActionId.AREA_ARM
+    async def send_zone_bypass(self, device : str, zone : int, bypass: bool) -> bool:
+        """Bypass or unbypass a zone, the listeners are left for the caller to update."""
+        if not await self.send_command(device, ActionId.ZONE_BYPASS if bypass else ActionId.ZONE_UNBYPASS, "zone", zone):
+            return False
+        if (state := self.get_device_state(device)) is not None and zone in state.alarm.zones:
+            state.alarm.zones[zone].status = ZoneCode.BYPASSED if bypass else ZoneCode.CLOSED
+        return True
+
+    async def send_command(self, device: str, action: ActionId, kind: str, number: int) -> bool:
+        """Send a command through the action plan of the device and time it until its state is seen."""
+        plan_action = self.action_plans.get(device, {}).get(action, action)
         try:
-            await self.api.send_action(device, action, area)
+            await self.api.send_action(device, plan_action, number)
         except (APIAuthError, APIConnectionError, APIActionError) as err:
-            _LOGGER.error("coordinator - Unable to arm device %s area %s", device, area)
+            _LOGGER.error("coordinator - Unable to send %s (%s) to device %s %s %s", action, plan_action, device, kind, number)
             _LOGGER.error(err)
             return False
+        if action in COMMAND_CONFIRM_STATUSES:
+            self.track_command(device, action, kind, number)
         return True
 
+    async def bulk_zone_bypass(self, device: str, zones: list[int], bypass: bool) -> dict[int, bool]:
+        """Bypass or unbypass several zones of a device concurrently, return the result per zone."""
+        # Zones the device does not have are not sent and fail
+        state = self.get_device_state(device)
+        known = [zone for zone in zones if state is not None and zone in state.alarm.zones]
+        results = dict(zip(known, await asyncio.gather(*(self.send_zone_bypass(device, zone, bypass) for zone in known))))
+        self.async_update_device_listeners(device)
+        return {zone: results.get(zone, False) for zone in zones}
+
+    async def bulk_area_action(self, targets: list[tuple[str, int]], mode: str) -> dict[str, dict[int, bool]]:
+        """Disarm or arm several areas concurrently, return the result per device and area."""
+        action = {
+            "disarm": self.area_disarm,
+            "arm_away": self.area_arm_away,
+            "arm_home": self.area_arm_home,
+            "arm_night": self.area_arm_night,
+        }[mode]
+        # Areas of devices not loaded, or that the device does not have, are not sent and fail
+        results: dict[str, dict[int, bool]] = {}
+        for device, area in targets:
+            results.setdefault(device, {})[area] = False
+        known = [(device, area) for device, area in targets if (state := self.get_device_state(device)) is not None and area in state.alarm.areas]
+        for (device, area), result in zip(known, await asyncio.gather(*(action(device, area) for device, area in known))):
+            results[device][area] = result
+        return results
+
+    def get_area_zones(self, device: str, area: int, status: str) -> list[int]:
+        """Return the zones of an area, from the zone to area index, that have a status."""
+        if (state := self.get_device_state(device)) is None:
+            return []
+        zones = state.alarm.zones
+        return [
+            zone_id for zone_id, area_ids in self.zone_areas.get(device, {}).items()
+            if area in area_ids and zone_id in zones and zones[zone_id].status == status
+        ]
+
+    def get_device_state(self, device: str) -> OlarmState | None:
+        """Return the state of a device, None if it was not loaded."""
+        if self.data is None:
+            return None
+        return self.data.olarm_state_data.get(device)
+
+    async def area_arm_away(self, device : str, area : int) -> bool:
+        """Arm a area"""
+        _LOGGER.debug("coordinator - Toggle Arm Area:%s on device %s", area, device)
+        return await self.send_command(device, ActionId.AREA_ARM, "area", area)
+
     async def area_disarm(self, device : str, area : int) -> bool:
         """Disarm a area"""
         _LOGGER.debug("coordinator - Toggle Disarm Area:%s on device %s", area, device)
-        try:
-            action : ActionId = action_map[self.get_alarm_make_by_id(device)][ActionId.AREA_DISARM]
-        except KeyError:
-                action = ActionId.AREA_DISARM
-        try:
-            await self.api.send_action(device, action, area)
-        except (APIAuthError, APIConnectionError, APIActionError) as err:
-            _LOGGER.error("coordinator - Unable to disarm device %s area %s", device, area)
-            _LOGGER.error(err)
-            return False
-        return True
+        return await self.send_command(device, ActionId.AREA_DISARM, "area", area)
 
     async def area_arm_home(self, device : str, area : int) -> bool:
         """Arm a area - Home"""
         _LOGGER.debug("coordinator - Toggle arm Area (Home):%s on device %s", area, device)
-        try:
-            action : ActionId = action_map[self.get_alarm_make_by_id(device)][ActionId.AREA_STAY]
-        except KeyError:
-                action = ActionId.AREA_STAY
-        try:
-            await self.api.send_action(device, action, area)
-        except (APIAuthError, APIConnectionError, APIActionError) as err:
-            _LOGGER.debug("coordinator - Action: %s ", action)
-            _LOGGER.error("coordinator - Unable to arm device (Home) %s area %s", device, area)
-            _LOGGER.error(err)
-            return False
-        return True
+        return await self.send_command(device, ActionId.AREA_STAY, "area", area)
 
     async def area_arm_night(self, device : str, area : int) -> bool:
         """Arm a area - Night"""
         _LOGGER.debug("coordinator - Toggle arm Area (Night):%s on device %s", area, device)
-        try:
-            action : ActionId = action_map[self.get_alarm_make_by_id(device)][ActionId.AREA_SLEEP]
-        except KeyError:
-                action = ActionId.AREA_SLEEP
-        try:
-            await self.api.send_action(device, action, area)
-        except (APIAuthError, APIConnectionError, APIActionError) as err:
-            _LOGGER.debug("coordinator - Action: %s ", action)
-            _LOGGER.error("coordinator - Unable to arm device (Night) %s area %s", device, area)
-            _LOGGER.error(err)
-            return False
-        return True
+        return await self.send_command(device, ActionId.AREA_SLEEP, "area", area)
 
     def get_olarm_status_by_id(
         self, device_id : str) -> OlarmDevice | None:
@@ -356,12 +955,23 @@ class OlarmCoordinator(DataUpdateCoordinator):
 
     def get_olarm_conf_data(self) -> list[dict[str, any]]:
         """Return list of devices."""
+        if self.sharded:
+            return {
+                device_id: conf
+                for shard in self.shards.values() if shard.data is not None
+                for device_id, conf in shard.data.olarm_conf_data.items()
+            }
+        if self.data is None:
+            # A device coordinator whose first refresh failed
+            return {}
         _LOGGER.debug("coordinator - returning list of Olarm devices : %i", len(self.data.olarm_conf_data))
         return self.data.olarm_conf_data
 
     async def async_handle_webhook(self, hass: HomeAssistant, webhook_id: str, request: web.Request) -> None:
         """Handle webhook callback."""
         body = await request.text()
+        if self.traffic_recorder is not None:
+            self.traffic_recorder.record({"kind": "webhook", "body": body, "signature": request.headers.get(OLARM_DIGEST_HEADER, "")})
 
         try:
             data = json.loads(body) if body else {}
@@ -388,46 +998,160 @@ class OlarmCoordinator(DataUpdateCoordinator):
             )
             return
 
-        if not isinstance(data, dict):
+        # A relay may batch several events in one body, signed once
+        events = data if isinstance(data, list) else [data]
+        if not events or len(events) > WEBHOOK_BATCH_LIMIT or not all(isinstance(event, dict) for event in events):
             _LOGGER.error(
-                "Received invalid data from Olarm. Data needs to be a dictionary: %s", data
+                "Received invalid data from Olarm. Data needs to be a dictionary, or a list of up to %i: %s", WEBHOOK_BATCH_LIMIT, data
             )
             return
 
-        ### Upadate state based on the data received
+        transaction = [event for event in events if self.admit_event(event)]
+        if not transaction:
+            return
+
+        # The events of a body are queued together so they are applied in the same batch, in order
+        self._webhook_queue.put_nowait(transaction)
+        self.webhook_metrics.max_queue_depth = max(self.webhook_metrics.max_queue_depth, self._webhook_queue.qsize())
+        if self._webhook_consumer is None or self._webhook_consumer.done():
+            self._webhook_consumer = self.config_entry.async_create_background_task(
+                self.hass, self.async_process_webhook_queue(), f"{self.name} webhook queue"
+            )
+        return
+
+    def admit_event(self, data: dict[str, any]) -> bool:
+        """Return if a webhook event should be queued, dropping unsupported and duplicate events."""
+        # Drop events for untracked devices, or that cannot change state, before they are queued
+        if not self.is_admitted(data):
+            _LOGGER.debug("Olarm Webhook - Rejecting event %s %s for device %s", data.get("eventAction"), data.get("eventState"), data.get("deviceId"))
+            self.webhook_metrics.rejected += 1
+            return False
+
+        fingerprint = get_event_fingerprint(data)
+        if fingerprint in self._recent_events:
+            _LOGGER.debug("Olarm Webhook - Dropping duplicate event %s", fingerprint)
+            self.webhook_metrics.duplicates += 1
+            return False
+        self._recent_events[fingerprint] = None
+        if len(self._recent_events) > WEBHOOK_DEDUP_SIZE:
+            self._recent_events.popitem(last=False)
+        return True
+
+    async def async_process_webhook_queue(self) -> None:
+        """Apply queued webhook events in batches, with one entity update per batch."""
+        while True:
+            batch = list(await self._webhook_queue.get())
+            # Let the rest of a burst arrive before applying it
+            await asyncio.sleep(self.webhook_debounce / 1000)
+            while not self._webhook_queue.empty():
+                batch.extend(self._webhook_queue.get_nowait())
+
+            # Areas changed by the batch, per device
+            changed: dict[str, set[int]] = {}
+            for data in batch:
+                try:
+                    result = self.for_device(data.get("deviceId")).apply_webhook_event(data)
+                except (KeyError, AttributeError):
+                    _LOGGER.error("Olarm Webhook - Unable to apply event for unknown device or area: %s", data)
+                    continue
+                except Exception:
+                    # A bad event must not stop the consumer and lose the rest of the batch
+                    _LOGGER.exception("Olarm Webhook - Unable to apply event: %s", data)
+                    continue
+                if result is not None:
+                    changed.setdefault(result[0], set()).update(result[1])
+            for device_id, area_ids in changed.items():
+                coordinator = self.for_device(device_id)
+                try:
+                    coordinator.reschedule_device(device_id)
+                    coordinator.async_update_device_listeners(device_id, area_ids)
+                except Exception:
+                    _LOGGER.exception("Olarm Webhook - Unable to update the entities of device %s", device_id)
+            if self.webhook_applied is not None:
+                self.webhook_applied(batch)
+
+            self.webhook_metrics.events += len(batch)
+            self.webhook_metrics.batches += 1
+            self.webhook_metrics.last_batch_size = len(batch)
+            self.webhook_metrics.max_batch_size = max(self.webhook_metrics.max_batch_size, len(batch))
+
+    def is_admitted(self, data: dict[str, any]) -> bool:
+        """Return if a webhook event is for a tracked device and can change its state."""
+        try:
+            return data.get("deviceId") in self.webhook_devices and (data.get("eventAction"), data.get("eventState")) in WEBHOOK_EVENTS
+        except TypeError:
+            # Lists or objects where ids and states are expected
+            return False
+
+    def apply_webhook_event(self, data: dict[str, any]) -> tuple[str, set[int]] | None:
+        """Update state from a webhook event, return the device and the areas it changed."""
         device_id = data.get("deviceId", None)
         event_action = data.get("eventAction", None)
         event_state = data.get("eventState", None)
         event_num = data.get("eventNum", None)
         event_time = data.get("eventTime", None)
-        event_msg = data.get("eventMsg", "")
 
         match event_action:
             case WebHookActions.ZONE_ALARM:
                 match event_state:
                     case WebHookStates.ALARM:
-                        """Zone has been triggered, but we don't know the area, so set all areas to alarmed"""
-                        for area in self.data.olarm_state_data[device_id].alarm.areas.values():
-                            area.status = "alarm"
+                        # Only the areas owning the zone are alarmed, all areas if the zone is not in the profile
+                        alarm_areas = self.data.olarm_state_data[device_id].alarm.areas
+                        area_ids = {
+                            area_id for area_id in self.zone_areas.get(device_id, {}).get(event_num, alarm_areas.keys())
+                            if not self.is_stale_event(device_id, area_id, event_time)
+                        }
+                        if not area_ids:
+                            return None
+                        for area_id in area_ids:
+                            area = alarm_areas[area_id]
+                            self.record_transition(device_id, "area", area_id, area.status, "alarm", event_time, EventSource.WEBHOOK)
+                            area.status = AreaStatus.ALARM
                             area.timestamp = event_time
-                            area.trigger_zones.append(event_num)
+                            if area.trigger_zones is None:
+                                area.trigger_zones = []
+                            if event_num not in area.trigger_zones:
+                                area.trigger_zones.append(event_num)
+                    case _:
+                        return None
             case WebHookActions.AREA:
-                match event_state:
-                    case WebHookStates.DISARMED:
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].status = "disarm"
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].timestamp = event_time
-                    case WebHookStates.STAYARM1:
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].status = "partarm1"
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].timestamp = event_time
-                    case WebHookStates.STAYARM2:
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].status = "partarm2"
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].timestamp = event_time
-                    case WebHookStates.STAYARM3:
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].status = "partarm3"
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].timestamp = event_time
-                    case WebHookStates.STAYARM4:
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].status = "partarm4"
-                        self.data.olarm_state_data[device_id].alarm.areas[event_num].timestamp = event_time
+                if self.is_stale_event(device_id, event_num, event_time):
+                    return None
+                if (status := WEBHOOK_STATE_TO_STATUS.get(event_state)) is None:
+                    return None
+                area = self.data.olarm_state_data[device_id].alarm.areas[event_num]
+                previous_status = area.status
+                area.status = status
+                area.timestamp = event_time
+                self.record_transition(device_id, "area", event_num, previous_status, status, event_time, EventSource.WEBHOOK)
+                area_ids = {event_num}
+            case _:
+                return None
 
-        self.async_update_listeners()
-        return
+        self.device_updated[device_id] = monotonic()
+        self.observe_commands(device_id, self.data.olarm_state_data[device_id], EventSource.WEBHOOK)
+        return device_id, area_ids
+
+    def seed_area_event_times(self, device_id: str, olarm_state: OlarmState) -> None:
+        """Record the polled area stamps, so webhook events older than the polled state are stale."""
+        for area_id, area in olarm_state.alarm.areas.items():
+            if (timestamp := parse_event_time(area.timestamp)) is None:
+                continue
+            key = (device_id, area_id)
+            self._area_event_times[key] = max(timestamp, self._area_event_times.get(key, timestamp))
+
+    def is_stale_event(self, device_id: str, area_id: int, event_time: any) -> bool:
+        """Return if a newer event or poll was already applied to the area, otherwise record this one."""
+        timestamp = parse_event_time(event_time)
+        if timestamp is None:
+            return False
+        if timestamp < self._area_event_times.get((device_id, area_id), timestamp):
+            _LOGGER.debug("Olarm Webhook - Dropping stale event for device %s area %s", device_id, area_id)
+            self.webhook_metrics.stale += 1
+            return True
+        self._area_event_times[(device_id, area_id)] = timestamp
+        return False
+
+    def get_webhook_metrics(self) -> dict[str, int]:
+        """Return the webhook queue and batch metrics."""
+        return asdict(self.webhook_metrics) | {"queue_depth": self._webhook_queue.qsize()}
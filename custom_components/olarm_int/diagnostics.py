@@ -0,0 +1,45 @@
+"""Diagnostics support for Olarm Integration."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_API_TOKEN, CONF_WEBHOOK_ID
+from homeassistant.core import HomeAssistant
+
+from . import OlarmConfigEntry
+from .const import CONF_WEBHOOK_SECRET
+
+TO_REDACT = {CONF_API_TOKEN, CONF_WEBHOOK_ID, CONF_WEBHOOK_SECRET}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: OlarmConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = config_entry.runtime_data.coordinator
+    # In sharded mode the device coordinators hold the per device figures
+    coordinators = [coordinator, *coordinator.shards.values()]
+    return {
+        "options": async_redact_data(dict(config_entry.options), TO_REDACT),
+        "device_tiers": {device: tier for each in coordinators for device, tier in each.device_tiers.items()},
+        "late_devices": sorted(device for each in coordinators for device in each.late_devices),
+        "late_counts": {device: count for each in coordinators for device, count in each.late_counts.items()},
+        "hedging": coordinator.api.hedge_stats,
+        "webhook": coordinator.get_webhook_metrics(),
+        "command_latency": {device: latency for each in coordinators for device, latency in each.get_command_latency().items()},
+        "command_timeouts": {device: count for each in coordinators for device, count in each.command_timeouts.items()},
+        "pending_commands": sum(len(pending) for each in coordinators for pending in each.pending_commands.values()),
+        "shards": {
+            device_id: {
+                "update_interval": shard.update_interval.total_seconds() if shard.update_interval else None,
+                "last_update_success": shard.last_update_success,
+            }
+            for device_id, shard in coordinator.shards.items()
+        },
+        "startup": coordinator.startup_timings | {
+            "devices": len(coordinator.get_olarm_conf_data()),
+            "listeners": sum(len(each._listeners) for each in coordinators),
+        },
+    }
@@ -1,4 +1,7 @@
-from .const import OlarmConf, AlarmConf, ZoneConf, AreaConf, OlarmDevice
+from datetime import datetime
+from statistics import quantiles
+
+from .const import ALARM_DEVICE_TO_HASS, DEFAULT_STATE_MAP, PANEL_STATE_MAPS, ActionId, action_map, OlarmConf, AlarmConf, ZoneConf, AreaConf, OlarmDevice
 
 async def get_entity_configuration(olarm_devices = list[OlarmDevice]) -> dict[str, OlarmConf]:
     """Return the entity configuration for the devices."""
@@ -22,7 +25,42 @@ async def get_entity_configuration(olarm_devices = list[OlarmDevice]) -> dict[st
                 ) for zone in device.alarm_detail.alarm_zones],
             area_conf=[AreaConf(
                 id=area.id,
-                label=area.label
+                label=area.label,
+                zones=area.zones
                 ) for area in device.alarm_detail.alarm_areas]
         )
     ) for device in olarm_devices}
+
+def parse_event_time(event_time: any) -> float | None:
+    """Return a webhook event time as epoch seconds, or None if it cannot be read."""
+    if isinstance(event_time, str):
+        try:
+            event_time = float(event_time)
+        except ValueError:
+            try:
+                return datetime.fromisoformat(event_time).timestamp()
+            except ValueError:
+                return None
+    if isinstance(event_time, (int, float)) and not isinstance(event_time, bool):
+        # Olarm stamps are in milliseconds
+        return event_time / 1000 if event_time > 1e11 else float(event_time)
+    return None
+
+def get_event_fingerprint(data: dict[str, any]) -> tuple:
+    """Return what identifies a webhook event, a redelivery has the same fingerprint."""
+    return (data.get("deviceId"), data.get("eventAction"), data.get("eventState"), data.get("eventNum"), data.get("eventTime"))
+
+def percentile(samples: list[float], rank: int) -> float:
+    """Return a percentile of samples, 0 if there are none."""
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return quantiles(samples, n=100, method="inclusive")[rank - 1]
+
+def get_state_map(alarm_make: str, state_map: dict[str, dict[str, str]]) -> dict[str, str]:
+    """Return the raw area status to alarm state mapping of an alarm make, the options override the defaults."""
+    return PANEL_STATE_MAPS.get(ALARM_DEVICE_TO_HASS.get(alarm_make), DEFAULT_STATE_MAP) | state_map.get(alarm_make, {})
+
+def get_action_plan(alarm_make: str, overrides: dict[str, dict[str, str]]) -> dict[ActionId, ActionId]:
+    """Return the action sent for each command to an alarm make, the options override the defaults."""
+    plan = {action: action for action in ActionId} | action_map.get(alarm_make, {})
+    return plan | {ActionId(action): ActionId(sent) for action, sent in overrides.get(alarm_make, {}).items()}
@@ -0,0 +1,206 @@
+"""Webhook load test, signed area events for a synthetic fleet are sent to a webhook handler at a fixed rate."""
+
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+import hmac
+import json
+import logging
+import secrets
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components import webhook
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.network import get_url
+
+from .const import DOMAIN, LOOP_LAG_INTERVAL, OLARM_DIGEST_ALG, OLARM_DIGEST_HEADER, AreaStatus, LoadTestTransport, WebHookActions, WebHookStates, ZoneCode, ZoneType
+from .helpers import percentile
+from .olarm_api import DeviceStatus
+from .traffic import ReplayRequest
+
+if TYPE_CHECKING:
+    from .coordinator import OlarmCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Each event flips its area between these states, so every applied event changes the area
+LOAD_TEST_STATES = (WebHookStates.STAYARM1, WebHookStates.DISARMED)
+LOAD_TEST_ALARM_MAKE = "ids_x64"
+
+
+def build_device_data(index: int, areas: int, zones: int, stamp: int = 0) -> dict[str, Any]:
+    """Return the api payload of a synthetic online and disarmed device."""
+    return {
+        "deviceId": f"loadtest-{index:05d}",
+        "deviceName": f"Load test {index}",
+        "deviceSerial": f"LT{index:08d}",
+        "deviceType": "loadtest",
+        "deviceStatus": DeviceStatus.ONLINE.value,
+        "deviceTimezone": "UTC",
+        "deviceFirmware": "loadtest",
+        "deviceAlarmType": LOAD_TEST_ALARM_MAKE,
+        "deviceAlarmTypeDetail": "Load test",
+        "deviceProfile": {
+            "areasLimit": areas,
+            "areasLabels": [f"Area {area}" for area in range(1, areas + 1)],
+            "zonesLimit": zones,
+            "zonesLabels": [f"Zone {zone}" for zone in range(1, zones + 1)],
+            "zonesTypes": [ZoneType.DOOR.value] * zones,
+        },
+        "deviceState": {
+            "areas": [AreaStatus.DISARMED.value] * areas,
+            "areasDetail": [[] for _ in range(areas)],
+            "areasStamp": [stamp] * areas,
+            "zones": [ZoneCode.CLOSED.value] * zones,
+            "zonesStamp": [stamp] * zones,
+            "power": {"AC": "1", "Batt": "1"},
+        },
+    }
+
+
+async def async_create_fleet(coordinator: OlarmCoordinator, devices: int, areas: int, zones: int) -> OlarmCoordinator:
+    """Return an isolated copy of a coordinator tracking a fleet of synthetic devices.
+
+    The devices are read through the api's payload parsing and merged like a poll. The copy
+    does not poll, record, fire events or touch the registries, and admits webhook events
+    for its own devices signed with a secret of its own.
+    """
+    from .coordinator import OlarmAPIData, OlarmCoordinator
+
+    fleet = OlarmCoordinator(coordinator.hass, coordinator.config_entry, coordinator.api.session, isolated=True)
+    fleet.data = OlarmAPIData(fleet.api.controller_name, {}, {})
+    olarm_devices = [await fleet.api.polulate_dataclass_from_api(build_device_data(index, areas, zones)) for index in range(devices)]
+    await fleet.merge_device_data(fleet.data, olarm_devices)
+    fleet.devices_to_track = [device.id for device in olarm_devices]
+    fleet.webhook_devices = frozenset(fleet.devices_to_track)
+    fleet.webhook_secret = secrets.token_hex(16)
+    return fleet
+
+
+def build_area_event(device_id: str, area_id: int, state: WebHookStates, event_time: int) -> dict[str, Any]:
+    """Return an Olarm webhook area event."""
+    return {
+        "deviceId": device_id,
+        "eventAction": WebHookActions.AREA,
+        "eventState": state,
+        "eventNum": area_id,
+        "eventTime": event_time,
+        "eventMsg": "load test",
+    }
+
+
+def sign_event(secret: str, data: Any) -> tuple[str, str]:
+    """Return the body and signature header Olarm would send for an event."""
+    body = json.dumps(data, separators=(",", ":"))
+    digest = hmac.new(secret.encode("utf-8"), body.encode("utf-8"), digestmod=OLARM_DIGEST_ALG).hexdigest()
+    return body, f"{OLARM_DIGEST_ALG}={digest}"
+
+
+async def async_measure_loop_lag(lag: list[float]) -> None:
+    """Record how late the event loop wakes a sleeper, until cancelled."""
+    while True:
+        due = monotonic() + LOOP_LAG_INTERVAL
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag.append(max(0.0, monotonic() - due))
+
+
+async def async_load_test(
+    coordinator: OlarmCoordinator,
+    rate: float,
+    duration: float,
+    transport: LoadTestTransport = LoadTestTransport.IN_PROCESS,
+    devices: int = 10,
+    areas: int = 2,
+    zones: int = 16,
+) -> dict[str, Any]:
+    """Send area events for a synthetic fleet at a rate and return throughput and latency figures.
+
+    The events go to an isolated copy of the coordinator, so the live devices, entities, bus
+    and webhook state are not affected. Over HTTP they are posted to a temporary local only
+    webhook. Latency is the time from sending an event to the update of its area's listeners,
+    where an entity would write its state. Events for an area that land in the same webhook
+    batch can cancel out and are counted as coalesced.
+    """
+    hass = coordinator.hass
+    fleet = await async_create_fleet(coordinator, devices, areas, zones)
+    targets = [
+        (olarm_conf.id, area_conf.id)
+        for olarm_conf in fleet.get_olarm_conf_data().values()
+        for area_conf in olarm_conf.alarm_conf.area_conf or []
+    ]
+    if not targets:
+        await fleet.async_shutdown()
+        return {"events": 0}
+
+    # Send times of the events not yet seen by the listeners, per area
+    in_flight: dict[tuple[str, int], list[float]] = {target: [] for target in targets}
+    latencies: list[float] = []
+
+    @callback
+    def async_area_updated(target: tuple[str, int]) -> None:
+        """Time the events of an area up to the update of its listeners."""
+        now = monotonic()
+        latencies.extend(now - sent for sent in in_flight[target])
+        in_flight[target].clear()
+
+    unsubs = [fleet.async_add_listener(partial(async_area_updated, target), target) for target in targets]
+    if transport == LoadTestTransport.HTTP:
+        session = async_get_clientsession(hass)
+        fleet.webhook_id = webhook.async_generate_id()
+        webhook.async_register(hass, DOMAIN, "Olarm load test", fleet.webhook_id, fleet.async_handle_webhook, local_only=True)
+        url = f"{get_url(hass, allow_external=False)}/api/webhook/{fleet.webhook_id}"
+    loop_lag: list[float] = []
+    lag_task = hass.async_create_background_task(async_measure_loop_lag(loop_lag), "olarm webhook load test loop lag")
+    count = int(rate * duration)
+    errors = 0
+    try:
+        started = monotonic()
+        base_time = int(time() * 1000)
+        for index in range(count):
+            if (delay := started + index / rate - monotonic()) > 0:
+                await asyncio.sleep(delay)
+            target = targets[index % len(targets)]
+            state = LOAD_TEST_STATES[(index // len(targets)) % len(LOAD_TEST_STATES)]
+            body, signature = sign_event(fleet.webhook_secret, build_area_event(*target, state, base_time + index))
+            in_flight[target].append(monotonic())
+            if transport == LoadTestTransport.HTTP:
+                try:
+                    async with session.post(url, data=body, headers={OLARM_DIGEST_HEADER: signature}) as resp:
+                        errors += resp.status >= 400
+                except Exception as err:
+                    _LOGGER.warning("Webhook load test request failed: %s", err)
+                    errors += 1
+            else:
+                await fleet.async_handle_webhook(hass, fleet.webhook_id, ReplayRequest(body, signature))
+        sent = monotonic() - started
+        # Let the last batch be applied
+        await asyncio.sleep(fleet.webhook_debounce / 1000 + 1)
+    finally:
+        lag_task.cancel()
+        for unsub in unsubs:
+            unsub()
+        if transport == LoadTestTransport.HTTP:
+            webhook.async_unregister(hass, fleet.webhook_id)
+        await fleet.async_shutdown()
+
+    metrics = fleet.get_webhook_metrics()
+    _LOGGER.debug("Webhook load test sent %i events for %i devices in %.3fs", count, devices, sent)
+    return {
+        "events": count,
+        "devices": devices,
+        "areas": len(targets),
+        "duration": sent,
+        "throughput": count / sent if sent else None,
+        "errors": errors,
+        "observed": len(latencies),
+        "coalesced": count - len(latencies),
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "loop_lag_p99_ms": percentile(loop_lag, 99) * 1000,
+        "max_loop_lag_ms": max(loop_lag, default=0.0) * 1000,
+        "batches": metrics["batches"],
+        "max_queue_depth": metrics["max_queue_depth"],
+    }
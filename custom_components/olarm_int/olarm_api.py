@@ -4,14 +4,18 @@ You should create your api seperately and have it hosted on PYPI.  This is inclu
 of making this example code executable.
 """
 
-from dataclasses import dataclass
-from enum import IntEnum, StrEnum
+import asyncio
+from collections import deque
+from enum import StrEnum
 import logging
 import json
-from random import choice, randrange
-from aiohttp import ClientSession
+import sys
+from time import monotonic
+from typing import AsyncIterator, Callable
+from aiohttp import ClientError, ClientSession, ClientTimeout
 
-from .const import BASE_URL, ActionId, AlarmArea, AlarmDevice, AlarmZone, DeviceType, OlarmDevice
+from .const import API_CONCURRENCY, BASE_URL, DEVICE_PAGE_LENGTH, REQUEST_TIMEOUT, HEDGE_BUDGET, HEDGE_MIN_SAMPLES, HEDGE_PERCENTILE, HEDGE_SAMPLES, ActionId, AlarmArea, AreaStatus, ZoneCode, AlarmDevice, AlarmZone, DeviceType, OlarmDevice, OlarmDeviceIndex
+from .helpers import percentile
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,6 +26,17 @@ class DeviceStatus(StrEnum):
     ONLINE = "online"
     PROBLEM = "problem"
 
+# Statuses repeat on every poll, decode them to the shared enum members instead of new strings
+_ZONE_CODES: dict[str, ZoneCode] = {code.value: code for code in ZoneCode}
+_AREA_STATUSES: dict[str, AreaStatus] = {status.value: status for status in AreaStatus}
+_DEVICE_STATUSES: dict[str, DeviceStatus] = {status.value: status for status in DeviceStatus}
+
+def intern_token(value: any, tokens: dict[str, StrEnum] | None = None) -> any:
+    """Return the shared instance of a status or label, unknown strings are interned."""
+    if tokens is not None and value in tokens:
+        return tokens[value]
+    return sys.intern(value) if isinstance(value, str) else value
+
 class OlarmAPI:
     """Class for Olarm API."""
 
@@ -34,55 +49,129 @@ class OlarmAPI:
             "Content-Type": "application/json",
         }
         self.connected: bool = False
+        self.user_id: str | None = None
+        # Called with every request and response when traffic recording is enabled
+        self.recorder: Callable[[dict[str, any]], None] | None = None
+        # Concurrent commands and fetches are queued so the api rate limit is not exceeded
+        self._semaphore = asyncio.Semaphore(API_CONCURRENCY)
+        # Device fetches slower than a rolling percentile get one duplicate, within a share of all fetches
+        self.hedging: bool = False
+        self.device_latencies: deque[float] = deque(maxlen=HEDGE_SAMPLES)
+        self.hedge_stats: dict[str, int] = {"requests": 0, "hedged": 0, "hedge_wins": 0}
 
     @property
     def controller_name(self) -> str:
         """Return the name of the controller."""
         return "Olarm API"
 
+    async def request(
+        self, method: str, path: str, data: str | None = None, timeout: float | None = None,
+        sent: asyncio.Event | None = None, latencies: deque[float] | None = None,
+    ) -> tuple[int, str]:
+        """Send a request to the api and return the response status and body.
+
+        The timeout covers the whole request once it is sent, not the wait for a free slot.
+        The sent event is set, and the latency added to latencies counted, from then on.
+        """
+        async with self._semaphore:
+            if sent is not None:
+                sent.set()
+            started = monotonic()
+            try:
+                resp = await self.session.request(
+                    method, f"{BASE_URL}{path}", headers=self.headers, data=data,
+                    timeout=ClientTimeout(total=timeout if timeout is not None else REQUEST_TIMEOUT),
+                )
+                body = await resp.text()
+            except TimeoutError as err:
+                raise APIConnectionError(f"Request {method} {path} timed out") from err
+            except ClientError as err:
+                raise APIConnectionError(f"Request {method} {path} failed: {err}") from err
+        duration = monotonic() - started
+        if latencies is not None:
+            latencies.append(duration)
+        if self.recorder is not None:
+            self.recorder({"kind": "api", "method": method, "path": path, "request": data,
+                           "status": resp.status, "body": body, "duration": duration})
+        return resp.status, body
+
+    async def iter_device_data(self, page_length: int = DEVICE_PAGE_LENGTH) -> AsyncIterator[dict[str, any]]:
+        """Yield the raw data of each device of the account, fetching one page at a time.
+
+        Each page is read and parsed whole, only one page is held while the next is fetched.
+        Stop iterating to skip the remaining pages. The user id is kept from the first page.
+        """
+        page = 1
+        seen: set[str] = set()
+        while True:
+            status, body = await self.request("GET", f"devices?page={page}&pageLength={page_length}")
+            match status:
+                case 403:
+                    raise APIAuthError("Error connecting to api. Invalid username or password.")
+                case 429:
+                    raise APIConnectionError("Error connecting to api. Too many requests.")
+                case 200:
+                    self.connected = True
+                case _:
+                    raise APIConnectionError("Unkown error connecting to api.")
+            data = json.loads(body)
+            del body
+            self.user_id = data.get("userId", self.user_id)
+            devices = data.get("data", [])
+            new_devices = 0
+            for device_data in devices:
+                if device_data["deviceId"] in seen:
+                    continue
+                seen.add(device_data["deviceId"])
+                new_devices += 1
+                yield device_data
+            # An api that ignores paging returns every device, or the same page again
+            if new_devices == 0 or len(devices) != page_length:
+                return
+            del data, devices, device_data
+            page += 1
+
+    async def iter_devices(self, page_length: int = DEVICE_PAGE_LENGTH) -> AsyncIterator[OlarmDevice]:
+        """Yield each device of the account, parsed one at a time."""
+        async for device_data in self.iter_device_data(page_length):
+            yield await self.polulate_dataclass_from_api(device_data)
+
     async def initial_connect(self) -> dict[str, any]:
         """Connect to api and download the list of devices."""
-        resp = await self.session.request("GET", f"{BASE_URL}devices", headers=self.headers)
-        match resp.status:
-            case 403:
-                raise APIAuthError("Error connecting to api. Invalid username or password.")
-            case 429:
-                raise APIConnectionError("Error connecting to api. Too many requests.")
-            case 200:
-                self.connected = True
-                data = await resp.json()
-                return { "userId" : data["userId"], "devices":
-                        [await self.polulate_dataclass_from_api(device_data) for device_data in data['data']]}
-        raise APIConnectionError("Unkown error connecting to api.")
+        devices = [device async for device in self.iter_devices()]
+        return { "userId" : self.user_id, "devices": devices}
+
+    async def get_device_index(self) -> dict[str, any]:
+        """Validate the token and list the devices, reading only their id, name and serial."""
+        devices = [self.get_device_index_entry(device_data) async for device_data in self.iter_device_data()]
+        return { "userId" : self.user_id, "devices": devices}
+
+    def get_device_index_entry(self, device_data: dict[str, any]) -> OlarmDeviceIndex:
+        """Return the identity of a device without parsing its profile and state."""
+        return OlarmDeviceIndex(
+            id=device_data["deviceId"],
+            label=device_data["deviceName"],
+            serial_number=device_data["deviceSerial"])
 
     def disconnect(self) -> bool:
         """Disconnect from api."""
         self.connected = False
         return True
 
-    async def get_all_devices(self) -> list[OlarmDevice] | None:
+    async def get_all_devices(self) -> list[OlarmDevice]:
         """Get all device from api."""
-        resp = await self.session.request("GET", f"{BASE_URL}devices", headers=self.headers)
-        _LOGGER.debug(resp.status)
-        match resp.status:
-            case 200:
-                self.connected = True
-                data = await resp.json()
-                _LOGGER.debug(data)
-                return  [await self.polulate_dataclass_from_api(device_data) for device_data in data['data']]
-            case 403:
-                raise APIAuthError("Error connecting to api. Invalid username or password.")
-            case 429:
-                raise APIConnectionError("Error connecting to api. Too many requests.")
-        return None
+        return [device async for device in self.iter_devices()]
 
-    async def get_device(self, deviceId :str) -> OlarmDevice | None:
+    async def get_device(self, deviceId :str, timeout: float | None = None) -> OlarmDevice | None:
         """Get a single device from api."""
-        resp = await self.session.request("GET", f"{BASE_URL}devices/{deviceId}", headers=self.headers)
-        match resp.status:
+        if self.hedging:
+            status, body = await self.hedged_request("GET", f"devices/{deviceId}", timeout)
+        else:
+            status, body = await self.request("GET", f"devices/{deviceId}", timeout=timeout, latencies=self.device_latencies)
+        match status:
             case 200:
                 self.connected = True
-                device_data = await resp.json()
+                device_data = json.loads(body)
                 return await self.polulate_dataclass_from_api(device_data)
             case 403:
                 raise APIAuthError("Error connecting to api. Invalid username or password.")
@@ -90,14 +179,60 @@ class OlarmAPI:
                 raise APIConnectionError("Error connecting to api. Too many requests.")
         return None
 
+    async def hedged_request(self, method: str, path: str, timeout: float | None = None) -> tuple[int, str]:
+        """Send a request, and a single duplicate if it is slower than usual, returning the first response.
+
+        The hedge delay runs from when the request holds a slot, time queued for one does not count.
+        """
+        self.hedge_stats["requests"] += 1
+        sent = asyncio.Event()
+        primary = asyncio.create_task(self.request(method, path, timeout=timeout, sent=sent, latencies=self.device_latencies))
+        tasks = [primary]
+        try:
+            delay = self.get_hedge_delay()
+            if delay is not None:
+                sending = asyncio.create_task(sent.wait())
+                tasks.append(sending)
+                await asyncio.wait({primary, sending}, return_when=asyncio.FIRST_COMPLETED)
+                if not primary.done():
+                    await asyncio.wait({primary}, timeout=delay)
+            # A duplicate that has to queue for a slot cannot overtake the request
+            if delay is None or primary.done() or self._semaphore.locked():
+                return await primary
+
+            self.hedge_stats["hedged"] += 1
+            hedge = asyncio.create_task(self.request(method, path, timeout=timeout, latencies=self.device_latencies))
+            tasks.append(hedge)
+            pending = {primary, hedge}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.hedge_stats["hedge_wins"] += task is hedge
+                        return task.result()
+            # Both failed, report the original request's error
+            return primary.result()
+        finally:
+            # Also when the caller is cancelled, no request is left running
+            for task in tasks:
+                task.cancel()
+
+    def get_hedge_delay(self) -> float | None:
+        """Return how long to wait before hedging a request, None if it may not be hedged."""
+        if len(self.device_latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        if self.hedge_stats["hedged"] >= HEDGE_BUDGET * self.hedge_stats["requests"]:
+            return None
+        return percentile(list(self.device_latencies), HEDGE_PERCENTILE)
+
     async def send_action(self, deviceId :str, action: ActionId, action_id: int) -> bool:
         """Get a single device from api."""
         action_data = { "actionCmd": action, "actionNum": action_id }
-        resp = await self.session.request("POST", f"{BASE_URL}devices/{deviceId}/actions", headers=self.headers, data=json.dumps(action_data))
-        _LOGGER.debug("send_action %s, response %s", action, await resp.json())
-        match resp.status:
+        status, body = await self.request("POST", f"devices/{deviceId}/actions", data=json.dumps(action_data))
+        _LOGGER.debug("send_action %s, response %s", action, body)
+        match status:
             case 200:
-                resp_data = await resp.json()
+                resp_data = json.loads(body)
                 if resp_data["actionStatus"] == "OK":
                     return True
                 raise APIActionError(f"Olarm API error message - {resp_data}")
@@ -105,6 +240,8 @@ class OlarmAPI:
                 raise APIAuthError("Error connecting to api. Invalid username or password.")
             case 429:
                 raise APIConnectionError("Error connecting to api. Too many requests.")
+            case _:
+                raise APIActionError(f"Olarm API returned status {status} for action {action}")
 
     async def polulate_dataclass_from_api(self, device_data: dict[str, any]) -> OlarmDevice:
         # Polulate Zone data
@@ -115,9 +252,9 @@ class OlarmAPI:
         zones = [
             AlarmZone(
                 id=item + 1,
-                label=device_data["deviceProfile"]["zonesLabels"][item],
+                label=intern_token(device_data["deviceProfile"]["zonesLabels"][item]),
                 type=device_data["deviceProfile"]["zonesTypes"][item],
-                status=device_data["deviceState"]["zones"][item],
+                status=intern_token(device_data["deviceState"]["zones"][item], _ZONE_CODES),
                 timestamp=device_data["deviceState"]["zonesStamp"][item],
             )
             for item in range(count_zones)
@@ -125,10 +262,11 @@ class OlarmAPI:
         areas = [
             AlarmArea(
                 id=item + 1,
-                label=device_data["deviceProfile"]["areasLabels"][item],
-                status=device_data["deviceState"]["areas"][item],
+                label=intern_token(device_data["deviceProfile"]["areasLabels"][item]),
+                status=intern_token(device_data["deviceState"]["areas"][item], _AREA_STATUSES),
                 trigger_zones=list(map(int,device_data["deviceState"]["areasDetail"][item])),
                 timestamp=device_data["deviceState"]["areasStamp"][item],
+                zones=list(map(int,device_data["deviceState"]["areasDetail"][item])),
             )
             for item in range(count_areas)
         ]
@@ -148,7 +286,7 @@ class OlarmAPI:
             label=device_data["deviceName"],
             serial_number=device_data["deviceSerial"],
             type=device_data["deviceType"],
-            status=device_data["deviceStatus"],
+            status=intern_token(device_data["deviceStatus"], _DEVICE_STATUSES),
             timezone=device_data.get("deviceTimezone"),
             firmware_version=device_data.get("deviceFirmware"),
             alarm_detail=alarm_detail)
@@ -1,16 +1,18 @@
 import logging
 
+from dataclasses import asdict
 from enum import StrEnum
 from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
 from homeassistant.components.sensor import (
     SensorEntity
 )
-from homeassistant.components.sensor.const import SensorDeviceClass
+from homeassistant.components.sensor.const import SensorDeviceClass, SensorStateClass
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.helpers.device_registry import DeviceInfo, callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import OlarmConfigEntry
-from .const import DOMAIN, ZoneType, ZoneStatus
+from .const import DOMAIN, ATTR_COMMAND_LATENCY, ATTR_DATA_AGE, ATTR_RECENT_EVENTS, TIMELINE_ATTRIBUTE_EVENTS, OlarmConf, ZoneConf, ZoneType, ZoneStatus
 
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -38,45 +40,64 @@ async def async_setup_entry(
     # to a list for each one.
     # This maybe different in your specific case, depending on how your data is structured
     sensors = []
-    for olarm_config in coordinator.data.olarm_conf_data.values():
-        sensors.extend([
-            OlarmStatusSensor(
-                coordinator,
-                alarm_device_id=olarm_config.id,
-                device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-{olarm_config.serial_number}")}
-                ),
-            AlarmBatterySensor(
-                coordinator,
-                olarm_device_id=olarm_config.id,
-                device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")}
-                ),
-            AlarmACSensor(
-                coordinator,
-                olarm_device_id=olarm_config.id,
-                device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")}
-                )
-
-        ])
-        sensors.extend([
-            ZoneSensor(
-                coordinator,
-                olarm_device_id=olarm_config.id,
-                sensor_id=zone.id,
-                label=zone.label,
-                type=zone.type,
-                via_device=(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}"),
-                device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}-zonesensor-{zone.id}")}
-            )
-            for zone in olarm_config.alarm_conf.zone_conf
-        ])
+    for device_coordinator, olarm_config in coordinator.get_device_coordinators():
+        sensors.extend(get_device_entities(device_coordinator, olarm_config))
 
     # Create the sensors.
-    async_add_entities(sensors)
+    async_add_entities(coordinator.async_new_entities(sensors))
+
+    @callback
+    def async_add_device(olarm_config: OlarmConf) -> None:
+        """Add the entities of an Olarm device that were not added yet."""
+        async_add_entities(coordinator.async_new_entities(get_device_entities(coordinator.for_device(olarm_config.id), olarm_config)))
+
+    coordinator.entity_adders.append(async_add_device)
+
+
+def get_device_entities(coordinator: OlarmCoordinator, olarm_config: OlarmConf) -> list[SensorEntity | BinarySensorEntity]:
+    """Return the sensors of an Olarm device."""
+    sensors = []
+    sensors.extend([
+        OlarmStatusSensor(
+            coordinator,
+            alarm_device_id=olarm_config.id,
+            device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-{olarm_config.serial_number}")}
+            ),
+        AlarmBatterySensor(
+            coordinator,
+            olarm_device_id=olarm_config.id,
+            device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")}
+            ),
+        AlarmACSensor(
+            coordinator,
+            olarm_device_id=olarm_config.id,
+            device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}")}
+            ),
+        CommandLatencySensor(
+            coordinator,
+            olarm_device_id=olarm_config.id,
+            device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-{olarm_config.serial_number}")}
+            )
+
+    ])
+    sensors.extend([
+        ZoneSensor(
+            coordinator,
+            olarm_device_id=olarm_config.id,
+            zone_conf=zone,
+            via_device=(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}"),
+            device_identifier={(DOMAIN, f"{coordinator.data.controller_name}-alarm_system-{olarm_config.alarm_conf.id}-zonesensor-{zone.id}")}
+        )
+        for zone in olarm_config.alarm_conf.zone_conf
+    ])
+    return sensors
 
 class OlarmStatusSensor(CoordinatorEntity, SensorEntity):
     """Implementation of a Olarm Status Sensor."""
 
     _attr_has_entity_name = False
+    # The age changes on every update, keep it out of the recorder
+    _unrecorded_attributes = frozenset({ATTR_DATA_AGE})
     _attr_translation_key = "devicestate"
     _attr_device_class = SensorDeviceClass.ENUM
     _attr_native_unit_of_measurement = None
@@ -85,7 +106,7 @@ class OlarmStatusSensor(CoordinatorEntity, SensorEntity):
 
     def __init__(self, coordinator, alarm_device_id: str, device_identifier=dict[tuple[str,str]]) -> None:
         """Initialise sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(alarm_device_id, None))
         self.coordinator = coordinator
         self.olarm_device_id = alarm_device_id
         self.name = "Device Status"
@@ -126,10 +147,15 @@ class OlarmStatusSensor(CoordinatorEntity, SensorEntity):
         return [SensorState.ONLINE, SensorState.OFFLINE, SensorState.PROBLEM]
 
 
+    @property
+    def extra_state_attributes(self) -> dict[str, any]:
+        """Return the seconds since the device state was last fetched."""
+        return {ATTR_DATA_AGE: self.coordinator.get_data_age(self.olarm_device_id)}
+
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.last_update_success
+        return self.coordinator.is_device_available(self.olarm_device_id)
 
 
 class AlarmBatterySensor(CoordinatorEntity, BinarySensorEntity):
@@ -141,7 +167,7 @@ class AlarmBatterySensor(CoordinatorEntity, BinarySensorEntity):
 
     def __init__(self, coordinator, olarm_device_id: str, device_identifier=dict[tuple[str,str]]) -> None:
         """Initialise sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(olarm_device_id, None))
         self.coordinator = coordinator
         self.olarm_device_id = olarm_device_id
         self.name = "Battery Status"
@@ -183,7 +209,7 @@ class AlarmBatterySensor(CoordinatorEntity, BinarySensorEntity):
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.last_update_success
+        return self.coordinator.is_device_available(self.olarm_device_id)
 
 class AlarmACSensor(CoordinatorEntity, BinarySensorEntity):
     """Implementation of a Olarm Status Sensor."""
@@ -194,7 +220,7 @@ class AlarmACSensor(CoordinatorEntity, BinarySensorEntity):
 
     def __init__(self, coordinator, olarm_device_id: str, device_identifier=dict[tuple[str,str]]) -> None:
         """Initialise sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(olarm_device_id, None))
         self.coordinator = coordinator
         self.olarm_device_id = olarm_device_id
         self.name = "AC Status"
@@ -236,29 +262,73 @@ class AlarmACSensor(CoordinatorEntity, BinarySensorEntity):
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.last_update_success
+        return self.coordinator.is_device_available(self.olarm_device_id)
     
 
+class CommandLatencySensor(CoordinatorEntity, SensorEntity):
+    """Implementation of a Olarm Command Latency Sensor."""
+
+    _attr_has_entity_name = False
+    # The percentiles per action are in diagnostics too, keep them out of the recorder
+    _unrecorded_attributes = frozenset({ATTR_COMMAND_LATENCY})
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, coordinator, olarm_device_id: str, device_identifier=dict[tuple[str,str]]) -> None:
+        """Initialise sensor."""
+        super().__init__(coordinator, context=(olarm_device_id, None))
+        self.coordinator = coordinator
+        self.olarm_device_id = olarm_device_id
+        self.name = "Command Latency"
+        self.device_identifier = device_identifier
+        self._attr_unique_id = f"{DOMAIN}-{olarm_device_id}-Command Latency Sensor"
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update sensor with latest data from coordinator."""
+        # The median latency of the slowest action, there is no value until a command is confirmed
+        latency = self.coordinator.get_command_latency(self.olarm_device_id).get(self.olarm_device_id, {})
+        self._attr_native_value = round(max(action["p50"] for action in latency.values()), 3) if latency else None
+        self._attr_extra_state_attributes = {ATTR_COMMAND_LATENCY: latency}
+        self.async_write_ha_state()
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return device information."""
+        return DeviceInfo(
+            identifiers=self.device_identifier
+        )
+
+    @property
+    def available(self) -> bool:
+        """Return if entity is available."""
+        return self.coordinator.is_device_available(self.olarm_device_id)
+
+
 class ZoneSensor(CoordinatorEntity, SensorEntity):
     """Implementation of a Olarm Status Sensor."""
 
     _attr_has_entity_name = False
+    # The timeline is available from the get_timeline service, keep it out of the recorder
+    _unrecorded_attributes = frozenset({ATTR_RECENT_EVENTS})
     _attr_device_class = SensorDeviceClass.ENUM
     _attr_native_unit_of_measurement = None
     _attr_suggested_unit_of_measurement = None
     _attr_state_class = None
 
-    def __init__(self, coordinator, olarm_device_id: str, sensor_id,label,type, via_device=tuple[str,str],device_identifier=dict[tuple[str,str]]) -> None:
+    def __init__(self, coordinator, olarm_device_id: str, zone_conf: ZoneConf, via_device=tuple[str,str],device_identifier=dict[tuple[str,str]]) -> None:
         """Initialise sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=(olarm_device_id, None))
         self.coordinator = coordinator
         self.olarm_device_id = olarm_device_id
-        self.sensor_id = sensor_id
+        self.sensor_id = zone_conf.id
         self.via_device = via_device
-        self.label = label
-        self.type = type
+        # Updated in place by the coordinator when the zone is renamed on the panel
+        self.zone_conf = zone_conf
         self.device_identifier = device_identifier
-        self._attr_unique_id = f"{DOMAIN}-{olarm_device_id}-Sensor-{sensor_id}"
+        self._attr_unique_id = f"{DOMAIN}-{olarm_device_id}-Sensor-{zone_conf.id}"
 
     @callback
     def _handle_coordinator_update(self) -> None:
@@ -280,26 +350,26 @@ class ZoneSensor(CoordinatorEntity, SensorEntity):
     @property
     def name(self) -> str:
         """Return the name of the sensor."""
-        match self.type:
+        match self.zone_conf.type:
             case ZoneType.DOOR:
-                return f"{self.sensor_id:0>2} Door - {self.label}"
+                return f"{self.sensor_id:0>2} Door - {self.zone_conf.label}"
             case ZoneType.WINDOW:
-                return f"{self.sensor_id:0>2} Window - {self.label}"
+                return f"{self.sensor_id:0>2} Window - {self.zone_conf.label}"
             case ZoneType.PIR_INDOOR:
-                return f"{self.sensor_id:0>2} Motion - {self.label}"
+                return f"{self.sensor_id:0>2} Motion - {self.zone_conf.label}"
             case ZoneType.PIR_OUTDOOR:
-                return f"{self.sensor_id:0>2} Motion - {self.label}"
+                return f"{self.sensor_id:0>2} Motion - {self.zone_conf.label}"
             case ZoneType.PANIC_BOTTON:
-                return f"{self.sensor_id:0>2} Panic - {self.label}"
+                return f"{self.sensor_id:0>2} Panic - {self.zone_conf.label}"
             case ZoneType.PANIC_ZONE:
-                return f"{self.sensor_id:0>2} Panic - {self.label}"
+                return f"{self.sensor_id:0>2} Panic - {self.zone_conf.label}"
             case _:
-                return f"{self.sensor_id:0>2} Zone - {self.label}"
+                return f"{self.sensor_id:0>2} Zone - {self.zone_conf.label}"
 
 
     @property
     def translation_key(self):
-        match self.type:
+        match self.zone_conf.type:
             case ZoneType.DOOR:
                 return "doorsensor"
             case ZoneType.WINDOW:
@@ -334,8 +404,15 @@ class ZoneSensor(CoordinatorEntity, SensorEntity):
         """Return the options of the sensor."""
         return [ZoneStatus.CLOSED, ZoneStatus.ACTIVE, ZoneStatus.BYPASSED]
 
+    @property
+    def extra_state_attributes(self) -> dict[str, any]:
+        """Return the recent transitions of the zone."""
+        return {ATTR_RECENT_EVENTS: [
+            asdict(entry) for entry in self.coordinator.get_timeline(self.olarm_device_id, "zone", self.sensor_id, TIMELINE_ATTRIBUTE_EVENTS)
+        ]}
+
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.last_update_success
\ No newline at end of file
+        return self.coordinator.is_device_available(self.olarm_device_id)
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""Services for the Olarm Integration integration."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from .const import DOMAIN, SERVICE_GET_TIMELINE, ATTR_DEVICE_ID, ATTR_AREA, ATTR_ZONE, ATTR_LIMIT
+from .const import SERVICE_REPLAY_TRAFFIC, ATTR_CONFIG_ENTRY_ID, ATTR_FILE, ATTR_SPEED, TRAFFIC_FILE
+from .const import SERVICE_BYPASS_ZONES, SERVICE_ARM_AREAS, ATTR_ZONES, ATTR_AREAS, ATTR_BYPASS, ATTR_MODE, AREA_MODES, ZoneCode
+from .const import SERVICE_LOAD_TEST_WEBHOOK, ATTR_RATE, ATTR_DURATION, ATTR_TRANSPORT, ATTR_DEVICES, ATTR_AREAS_PER_DEVICE, ATTR_ZONES_PER_DEVICE, LoadTestTransport
+from .coordinator import OlarmCoordinator
+
+GET_TIMELINE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): cv.string,
+        vol.Exclusive(ATTR_AREA, "item"): cv.positive_int,
+        vol.Exclusive(ATTR_ZONE, "item"): cv.positive_int,
+        vol.Optional(ATTR_LIMIT): cv.positive_int,
+    }
+)
+
+REPLAY_TRAFFIC_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FILE): cv.string,
+        vol.Optional(ATTR_SPEED, default=1.0): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+LOAD_TEST_WEBHOOK_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_RATE, default=50.0): vol.All(vol.Coerce(float), vol.Range(min=1, max=5000)),
+        vol.Optional(ATTR_DURATION, default=10.0): vol.All(vol.Coerce(float), vol.Range(min=1, max=300)),
+        vol.Optional(ATTR_TRANSPORT, default=LoadTestTransport.IN_PROCESS): vol.Coerce(LoadTestTransport),
+        vol.Optional(ATTR_DEVICES, default=10): vol.All(vol.Coerce(int), vol.Range(min=1, max=1000)),
+        vol.Optional(ATTR_AREAS_PER_DEVICE, default=2): vol.All(vol.Coerce(int), vol.Range(min=1, max=8)),
+        vol.Optional(ATTR_ZONES_PER_DEVICE, default=16): vol.All(vol.Coerce(int), vol.Range(min=0, max=192)),
+    }
+)
+
+BYPASS_ZONES_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_DEVICE_ID): cv.string,
+            vol.Exclusive(ATTR_ZONES, "zones"): vol.All(cv.ensure_list, [cv.positive_int]),
+            vol.Exclusive(ATTR_AREA, "zones"): cv.positive_int,
+            vol.Optional(ATTR_BYPASS, default=True): cv.boolean,
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_ZONES, ATTR_AREA),
+)
+
+ARM_AREAS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_ID): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional(ATTR_AREAS): vol.All(cv.ensure_list, [cv.positive_int]),
+        vol.Required(ATTR_MODE): vol.In(AREA_MODES),
+    }
+)
+
+
+def get_loaded_entry(hass: HomeAssistant, entry_id: str) -> ConfigEntry:
+    """Return a loaded Olarm config entry."""
+    config_entry = hass.config_entries.async_get_entry(entry_id)
+    if config_entry is None or config_entry.domain != DOMAIN or config_entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(f"Config entry {entry_id} is not a loaded Olarm entry")
+    return config_entry
+
+
+def get_coordinator(hass: HomeAssistant, device_id: str) -> OlarmCoordinator:
+    """Return the coordinator tracking an Olarm device."""
+    for config_entry in hass.config_entries.async_entries(DOMAIN):
+        if config_entry.state is not ConfigEntryState.LOADED:
+            continue
+        coordinator: OlarmCoordinator = config_entry.runtime_data.coordinator
+        if device_id in coordinator.devices_to_track:
+            return coordinator.for_device(device_id)
+    raise ServiceValidationError(f"Olarm device {device_id} is not tracked by a loaded config entry")
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Olarm services."""
+
+    async def async_get_timeline(call: ServiceCall) -> ServiceResponse:
+        """Return the recent area and zone transitions of a device."""
+        device_id = call.data[ATTR_DEVICE_ID]
+        coordinator = get_coordinator(hass, device_id)
+        limit = call.data.get(ATTR_LIMIT)
+
+        response = {"areas": {}, "zones": {}}
+        for kind, item_id in coordinator.timelines.get(device_id, {}):
+            if ATTR_AREA in call.data and (kind, item_id) != ("area", call.data[ATTR_AREA]):
+                continue
+            if ATTR_ZONE in call.data and (kind, item_id) != ("zone", call.data[ATTR_ZONE]):
+                continue
+            response[f"{kind}s"][str(item_id)] = [
+                asdict(entry) for entry in coordinator.get_timeline(device_id, kind, item_id, limit)
+            ]
+        return response
+
+    async def async_replay_traffic(call: ServiceCall) -> ServiceResponse:
+        """Replay a traffic recording into a config entry's coordinator."""
+        config_entry = get_loaded_entry(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+        path = hass.config.path(call.data.get(ATTR_FILE, TRAFFIC_FILE.format(entry_id=config_entry.entry_id)))
+        if not hass.config.is_allowed_path(path):
+            raise ServiceValidationError(f"Access to {path} is not allowed")
+        from .traffic import async_replay
+
+        try:
+            return await async_replay(config_entry.runtime_data.coordinator, path, call.data[ATTR_SPEED])
+        except FileNotFoundError as err:
+            raise ServiceValidationError(f"Recording {path} does not exist") from err
+
+    async def async_load_test_webhook(call: ServiceCall) -> ServiceResponse:
+        """Flood a copy of a config entry's webhook handler with signed area events for a synthetic fleet."""
+        config_entry = get_loaded_entry(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+        coordinator: OlarmCoordinator = config_entry.runtime_data.coordinator
+        from .loadtest import async_load_test
+
+        return await async_load_test(
+            coordinator, call.data[ATTR_RATE], call.data[ATTR_DURATION], call.data[ATTR_TRANSPORT],
+            call.data[ATTR_DEVICES], call.data[ATTR_AREAS_PER_DEVICE], call.data[ATTR_ZONES_PER_DEVICE],
+        )
+
+    async def async_bypass_zones(call: ServiceCall) -> ServiceResponse:
+        """Bypass or unbypass a list of zones, or the zones of an area, of a device."""
+        device_id = call.data[ATTR_DEVICE_ID]
+        coordinator = get_coordinator(hass, device_id)
+        bypass = call.data[ATTR_BYPASS]
+        if ATTR_AREA in call.data:
+            # Open zones are bypassed, bypassed zones are restored
+            zones = coordinator.get_area_zones(device_id, call.data[ATTR_AREA], ZoneCode.ACTIVE if bypass else ZoneCode.BYPASSED)
+        else:
+            zones = call.data[ATTR_ZONES]
+        results = await coordinator.bulk_zone_bypass(device_id, zones, bypass)
+        return {"zones": {str(zone): result for zone, result in results.items()}}
+
+    async def async_arm_areas(call: ServiceCall) -> ServiceResponse:
+        """Disarm or arm some or all areas of several devices."""
+        by_coordinator: dict[OlarmCoordinator, list[tuple[str, int]]] = {}
+        for device_id in call.data[ATTR_DEVICE_ID]:
+            coordinator = get_coordinator(hass, device_id)
+            # A device that is not loaded yet has no areas to default to
+            olarm_conf = coordinator.get_olarm_conf_data().get(device_id)
+            areas = call.data.get(ATTR_AREAS) or [
+                area.id for area in (olarm_conf.alarm_conf.area_conf if olarm_conf is not None else None) or []
+            ]
+            by_coordinator.setdefault(coordinator, []).extend((device_id, area) for area in areas)
+
+        results = await asyncio.gather(*(
+            coordinator.bulk_area_action(targets, call.data[ATTR_MODE]) for coordinator, targets in by_coordinator.items()
+        ))
+        response = {device_id: {} for device_id in call.data[ATTR_DEVICE_ID]}
+        for coordinator_results in results:
+            for device_id, areas in coordinator_results.items():
+                response[device_id] = {str(area): result for area, result in areas.items()}
+        return {"devices": response}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BYPASS_ZONES,
+        async_bypass_zones,
+        schema=BYPASS_ZONES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ARM_AREAS,
+        async_arm_areas,
+        schema=ARM_AREAS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REPLAY_TRAFFIC,
+        async_replay_traffic,
+        schema=REPLAY_TRAFFIC_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_LOAD_TEST_WEBHOOK,
+        async_load_test_webhook,
+        schema=LOAD_TEST_WEBHOOK_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TIMELINE,
+        async_get_timeline,
+        schema=GET_TIMELINE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,195 @@
+"""Record and replay of Olarm API and webhook traffic."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict, deque
+import json
+import logging
+from time import monotonic, time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import BASE_URL, OLARM_DIGEST_HEADER
+from .helpers import get_event_fingerprint, percentile
+
+if TYPE_CHECKING:
+    from .coordinator import OlarmCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class TrafficRecorder:
+    """Append api and webhook traffic to a JSON lines file."""
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialise recorder."""
+        self.hass = hass
+        self.path = path
+        self._pending: list[str] = []
+        self._flush_scheduled = False
+        self._write_lock = asyncio.Lock()
+
+    @callback
+    def record(self, entry: dict[str, Any]) -> None:
+        """Queue an entry, the file is written from the executor."""
+        self._pending.append(json.dumps({"time": time()} | entry, separators=(",", ":")))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.hass.async_create_background_task(self.async_flush(), f"olarm traffic flush {self.path}")
+
+    async def async_flush(self) -> None:
+        """Write the queued entries to the file."""
+        async with self._write_lock:
+            self._flush_scheduled = False
+            lines, self._pending = self._pending, []
+            if lines:
+                await self.hass.async_add_executor_job(self._write, lines)
+
+    def _write(self, lines: list[str]) -> None:
+        """Append lines to the file."""
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+
+
+class ReplayResponse:
+    """Recorded api response."""
+
+    def __init__(self, status: int, body: str) -> None:
+        """Initialise response."""
+        self.status = status
+        self._body = body
+
+    async def text(self) -> str:
+        """Return the response body."""
+        return self._body
+
+    async def json(self) -> Any:
+        """Return the decoded response body."""
+        return json.loads(self._body)
+
+
+class ReplaySession:
+    """Serve recorded api responses in place of the websession."""
+
+    def __init__(self, entries: list[dict[str, Any]]) -> None:
+        """Initialise session from the recorded api entries."""
+        self._responses: dict[tuple[str, str], deque[dict[str, Any]]] = defaultdict(deque)
+        for entry in entries:
+            self._responses[(entry["method"], entry["path"])].append(entry)
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> ReplayResponse:
+        """Return the next recorded response for the request, the last one is repeated."""
+        responses = self._responses.get((method, url.removeprefix(BASE_URL)))
+        if not responses:
+            return ReplayResponse(404, "")
+        entry = responses.popleft() if len(responses) > 1 else responses[0]
+        return ReplayResponse(entry["status"], entry["body"])
+
+
+class ReplayRequest:
+    """Recorded webhook request."""
+
+    def __init__(self, body: str, signature: str) -> None:
+        """Initialise request."""
+        self.headers = {OLARM_DIGEST_HEADER: signature}
+        self._body = body
+
+    async def text(self) -> str:
+        """Return the request body."""
+        return self._body
+
+
+def read_recording(path: str) -> list[dict[str, Any]]:
+    """Read a recording, in time order."""
+    with open(path, encoding="utf-8") as file:
+        entries = [json.loads(line) for line in file if line.strip()]
+    return sorted(entries, key=lambda entry: entry["time"])
+
+
+async def async_replay(coordinator: OlarmCoordinator, path: str, speed: float = 1.0) -> dict[str, Any]:
+    """Feed a recording into a copy of a coordinator and return throughput and latency figures.
+
+    The recording is replayed into an isolated coordinator with its own api, so the live
+    devices, entities and commands are not affected. Webhooks are sent to its webhook handler
+    and timed until their batch is applied. Device fetches are answered from the recording
+    and timed until merged. Entries are sent at the recorded pace divided by speed, or as
+    fast as possible if speed is 0. Webhooks for a device are admitted once it was fetched.
+    """
+    from .coordinator import OlarmAPIData, OlarmCoordinator
+
+    entries = await coordinator.hass.async_add_executor_job(read_recording, path)
+    if not entries:
+        return {"entries": 0}
+
+    replay = OlarmCoordinator(
+        coordinator.hass, coordinator.config_entry, ReplaySession([entry for entry in entries if entry["kind"] == "api"]), isolated=True
+    )
+    replay.data = OlarmAPIData(replay.api.controller_name, {}, {})
+    replay.webhook_devices = frozenset()
+    # Dispatch times of the webhook events not applied yet, per event fingerprint
+    in_flight: dict[tuple, deque[float]] = defaultdict(deque)
+    latencies: list[float] = []
+    lag: list[float] = []
+
+    @callback
+    def async_webhook_applied(events: list[dict[str, Any]]) -> None:
+        """Time the events of an applied batch from their dispatch."""
+        now = monotonic()
+        for event in events:
+            if dispatched := in_flight.get(get_event_fingerprint(event)):
+                latencies.append(now - dispatched.popleft())
+
+    replay.webhook_applied = async_webhook_applied
+    fetches = 0
+    try:
+        started = monotonic()
+        for entry in entries:
+            if speed > 0:
+                due = started + (entry["time"] - entries[0]["time"]) / speed
+                if (delay := due - monotonic()) > 0:
+                    await asyncio.sleep(delay)
+                lag.append(max(0.0, monotonic() - due))
+
+            dispatched = monotonic()
+            if entry["kind"] == "webhook":
+                try:
+                    data = json.loads(entry["body"])
+                except ValueError:
+                    data = None
+                for event in data if isinstance(data, list) else [data]:
+                    if isinstance(event, dict):
+                        in_flight[get_event_fingerprint(event)].append(dispatched)
+                await replay.async_handle_webhook(
+                    replay.hass, replay.webhook_id, ReplayRequest(entry["body"], entry["signature"])
+                )
+            elif entry["method"] == "GET" and entry["path"].startswith("devices/"):
+                device = await replay.api.get_device(entry["path"].removeprefix("devices/"))
+                if device is None:
+                    continue
+                await replay.merge_device_data(replay.data, [device])
+                replay.webhook_devices |= {device.id}
+                latencies.append(monotonic() - dispatched)
+                fetches += 1
+        duration = monotonic() - started
+        # Let the last webhook batch be applied
+        deadline = monotonic() + replay.webhook_debounce / 1000 + 1
+        while any(in_flight.values()) and monotonic() < deadline:
+            await asyncio.sleep(0.01)
+    finally:
+        await replay.async_shutdown()
+
+    webhooks = len(latencies) - fetches
+    _LOGGER.debug("Replayed %i fetches and %i webhook events from %s in %.3fs", fetches, webhooks, path, duration)
+    return {
+        "entries": len(entries),
+        "fetches": fetches,
+        "webhook_events": webhooks,
+        "webhook_unapplied": sum(len(dispatched) for dispatched in in_flight.values()),
+        "duration": duration,
+        "throughput": len(latencies) / duration if duration else None,
+        "latency_p50_ms": percentile(latencies, 50) * 1000,
+        "latency_p99_ms": percentile(latencies, 99) * 1000,
+        "max_lag_ms": max(lag, default=0.0) * 1000,
+    }
@@ -0,0 +1,45 @@
+"""Helpers for the Olarm integration tests."""
+
+from typing import Any
+
+from homeassistant.const import CONF_API_TOKEN, Platform
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.olarm_int.const import BASE_URL, DOMAIN
+from custom_components.olarm_int.loadtest import build_device_data
+
+
+def get_device_url(device_id: str) -> str:
+    """Return the api url of a device."""
+    return f"{BASE_URL}devices/{device_id}"
+
+
+def mock_device(aioclient_mock: AiohttpClientMocker, index: int, areas: int = 2, zones: int = 8) -> str:
+    """Answer the requests for a synthetic device, return its id."""
+    device_data = build_device_data(index, areas, zones)
+    aioclient_mock.get(get_device_url(device_data["deviceId"]), json=device_data)
+    return device_data["deviceId"]
+
+
+def mock_fleet(
+    aioclient_mock: AiohttpClientMocker, devices: int, areas: int = 2, zones: int = 8, options: dict[str, Any] | None = None
+) -> MockConfigEntry:
+    """Answer the device requests of a synthetic fleet, return a config entry tracking all of it."""
+    device_ids = [mock_device(aioclient_mock, index, areas, zones) for index in range(devices)]
+    return MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_API_TOKEN: "token",
+            "devices": {device_id: {"id": device_id, "label": device_id, "serial_number": device_id} for device_id in device_ids},
+        },
+        options={device_id: True for device_id in device_ids} | (options or {}),
+        unique_id="fleet",
+    )
+
+
+def get_panel_entity_id(hass: HomeAssistant, device_id: str, area_id: int) -> str | None:
+    """Return the entity id of the alarm panel of an area, if it was added."""
+    return er.async_get(hass).async_get_entity_id(Platform.ALARM_CONTROL_PANEL, DOMAIN, f"{DOMAIN}-{device_id}-Area-{area_id}")
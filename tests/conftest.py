@@ -0,0 +1,9 @@
+"""Fixtures for the Olarm integration tests."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the custom integrations in all tests."""
+    yield
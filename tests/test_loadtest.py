@@ -0,0 +1,50 @@
+"""Tests for the Olarm webhook load test."""
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.core import Event, HomeAssistant, callback
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.olarm_int.const import EVENT_AREA_CHANGED, EVENT_ZONE_CHANGED, AreaStatus
+from custom_components.olarm_int.loadtest import async_load_test
+
+from .common import mock_fleet
+
+RATE = 200
+DURATION = 1
+
+
+async def test_load_test_leaves_live_devices_untouched(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker) -> None:
+    """Test the load test applies its events to a synthetic fleet only."""
+    config_entry = mock_fleet(aioclient_mock, 1)
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = config_entry.runtime_data.coordinator
+    device_id = next(iter(coordinator.get_olarm_conf_data()))
+    metrics = coordinator.get_webhook_metrics()
+    timelines = {key: list(timeline) for key, timeline in coordinator.timelines[device_id].items()}
+    fired: list[Event] = []
+
+    @callback
+    def async_record(event: Event) -> None:
+        """Record an event of the integration."""
+        fired.append(event)
+
+    hass.bus.async_listen(EVENT_AREA_CHANGED, async_record)
+    hass.bus.async_listen(EVENT_ZONE_CHANGED, async_record)
+
+    result = await async_load_test(coordinator, RATE, DURATION, devices=3, areas=2, zones=4)
+
+    assert result["events"] == RATE * DURATION
+    assert result["areas"] == 6
+    assert result["errors"] == 0
+    assert result["observed"] + result["coalesced"] == result["events"]
+    assert result["observed"] > 0
+    assert result["batches"] > 0
+    assert coordinator.get_webhook_metrics() == metrics
+    assert {key: list(timeline) for key, timeline in coordinator.timelines[device_id].items()} == timelines
+    assert coordinator.data.olarm_state_data[device_id].alarm.areas[1].status == AreaStatus.DISARMED
+    assert not fired
@@ -0,0 +1,104 @@
+"""Memory budget of the Olarm coordinator over many polls and webhook events."""
+
+import gc
+import json
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.const import CONF_API_TOKEN
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.olarm_int.const import DOMAIN, AreaStatus, WebHookActions, WebHookStates, ZoneCode
+from custom_components.olarm_int.coordinator import OlarmAPIData, OlarmCoordinator
+from custom_components.olarm_int.loadtest import build_device_data
+
+DEVICES = 5
+AREAS = 2
+ZONES = 32
+WARMUP_POLLS = 100
+POLLS = 2000
+# Retained bytes allowed per device, and per zone of a device, once the timelines are full. About
+# 1.5 times the measured 56 kB per device, the coordinator included, and 2.9 kB per zone.
+DEVICE_BUDGET = 84 * 1024
+ZONE_BUDGET = 4400
+# Growth allowed per device over the second half of the polls, 32 bytes in all were measured
+LEAK_TOLERANCE = 256
+
+AREA_STATUSES = [AreaStatus.DISARMED, AreaStatus.STAY, AreaStatus.ARMED, AreaStatus.ALARM]
+ZONE_CODES = [ZoneCode.CLOSED, ZoneCode.ACTIVE, ZoneCode.BYPASSED]
+
+
+async def async_poll(coordinator: OlarmCoordinator, poll: int) -> None:
+    """Merge a poll of the fleet in which every area and zone changes, then alarm a zone per device."""
+    olarm_devices = []
+    for index in range(DEVICES):
+        device_data = build_device_data(index, AREAS, ZONES, stamp=poll)
+        state = device_data["deviceState"]
+        state["areas"] = [AREA_STATUSES[(poll + area) % len(AREA_STATUSES)].value for area in range(AREAS)]
+        state["zones"] = [ZONE_CODES[(poll + zone) % len(ZONE_CODES)].value for zone in range(ZONES)]
+        # Decoded like an api response, with fresh strings on every poll
+        olarm_devices.append(await coordinator.api.polulate_dataclass_from_api(json.loads(json.dumps(device_data))))
+    await coordinator.merge_device_data(coordinator.data, olarm_devices)
+
+    # A repeated alarm of a zone must not add it to the trigger zones again
+    for device in olarm_devices:
+        for zone in (poll % ZONES + 1, poll % ZONES + 1, (poll + 1) % ZONES + 1):
+            coordinator.apply_webhook_event({
+                "deviceId": device.id,
+                "eventAction": WebHookActions.ZONE_ALARM.value,
+                "eventState": WebHookStates.ALARM.value,
+                "eventNum": zone,
+                "eventTime": poll,
+            })
+
+
+def get_traced_memory() -> int:
+    """Return the bytes currently allocated, after a collection."""
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0]
+
+
+async def test_memory_budget(hass: HomeAssistant) -> None:
+    """Test the retained state stays within budget and does not grow with the number of polls."""
+    config_entry = MockConfigEntry(domain=DOMAIN, data={CONF_API_TOKEN: "token", "devices": {}}, unique_id="memory")
+    config_entry.add_to_hass(hass)
+
+    tracemalloc.start()
+    try:
+        baseline = get_traced_memory()
+        coordinator = OlarmCoordinator(hass, config_entry, async_get_clientsession(hass), isolated=True)
+        coordinator.data = OlarmAPIData(coordinator.api.controller_name, {}, {})
+        for poll in range(WARMUP_POLLS):
+            await async_poll(coordinator, poll)
+        for poll in range(WARMUP_POLLS, WARMUP_POLLS + POLLS // 2):
+            await async_poll(coordinator, poll)
+        middle = get_traced_memory()
+        for poll in range(WARMUP_POLLS + POLLS // 2, WARMUP_POLLS + POLLS):
+            await async_poll(coordinator, poll)
+        end = get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert end - baseline <= DEVICES * (DEVICE_BUDGET + ZONES * ZONE_BUDGET)
+    assert end - middle <= DEVICES * LEAK_TOLERANCE
+
+    # Webhook alarms add each trigger zone once
+    for olarm_state in coordinator.data.olarm_state_data.values():
+        for area in olarm_state.alarm.areas.values():
+            assert len(area.trigger_zones) == len(set(area.trigger_zones))
+
+    # Statuses decoded on every poll share the enum instances
+    statuses = {
+        id(status)
+        for olarm_state in coordinator.data.olarm_state_data.values()
+        for status in [zone.status for zone in olarm_state.alarm.zones.values()]
+        + [area.status for area in olarm_state.alarm.areas.values()]
+    }
+    assert len(statuses) <= len(ZONE_CODES) + len(AREA_STATUSES)
+
+    await coordinator.async_shutdown()
@@ -0,0 +1,65 @@
+"""Tests for the Olarm api client."""
+
+import gc
+import json
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.olarm_int.const import BASE_URL
+from custom_components.olarm_int.loadtest import build_device_data
+from custom_components.olarm_int.olarm_api import OlarmAPI
+
+PAGE_LENGTH = 25
+AREAS = 4
+ZONES = 64
+# Bytes a long fetch may add per device over a fetch of two pages, for the ids kept to detect a
+# repeated page and the requests logged by the mocked session, measured at about 135
+SEEN_DEVICE_BYTES = 200
+
+
+def mock_pages(aioclient_mock: AiohttpClientMocker, pages: int) -> None:
+    """Answer the device list with full pages, then an empty one."""
+    for page in range(1, pages + 2):
+        devices = [
+            build_device_data(index, AREAS, ZONES) for index in range((page - 1) * PAGE_LENGTH, page * PAGE_LENGTH)
+        ] if page <= pages else []
+        aioclient_mock.get(
+            f"{BASE_URL}devices?page={page}&pageLength={PAGE_LENGTH}", text=json.dumps({"userId": "user", "data": devices})
+        )
+
+
+async def async_measure_fetch(api: OlarmAPI) -> tuple[int, int]:
+    """Page through the account, return the devices read and the peak bytes allocated meanwhile."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        count = 0
+        async for _ in api.iter_device_data(PAGE_LENGTH):
+            count += 1
+        return count, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("pages", [10, 80])
+async def test_paged_fetch_peak_memory(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, pages: int) -> None:
+    """Test the peak memory of a paged fetch is bounded by a page, not by the payload of the account."""
+    api = OlarmAPI("token", async_get_clientsession(hass))
+    mock_pages(aioclient_mock, 2)
+    count, two_pages_peak = await async_measure_fetch(api)
+    assert count == 2 * PAGE_LENGTH
+
+    aioclient_mock.clear_requests()
+    mock_pages(aioclient_mock, pages)
+    count, peak = await async_measure_fetch(api)
+    print(f"peak of {pages} pages {peak} bytes, of 2 pages {two_pages_peak} bytes")
+    assert count == pages * PAGE_LENGTH
+    assert api.user_id == "user"
+    assert peak <= two_pages_peak + (pages - 2) * PAGE_LENGTH * SEEN_DEVICE_BYTES
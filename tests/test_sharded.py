@@ -0,0 +1,67 @@
+"""Tests for the sharded mode of the Olarm integration, one coordinator per device."""
+
+from datetime import timedelta
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.olarm_int.const import CONF_SHARDED, DEFAULT_TIER_ALARM_INTERVAL
+from custom_components.olarm_int.loadtest import build_device_data
+
+from .common import get_device_url, get_panel_entity_id, mock_device, mock_fleet
+
+DEVICES = 2
+
+
+async def test_shards_follow_their_device(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker) -> None:
+    """Test each device gets a coordinator its entities and webhook events are routed to."""
+    config_entry = mock_fleet(aioclient_mock, DEVICES, options={CONF_SHARDED: True})
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    hub = config_entry.runtime_data.coordinator
+    assert hub.sharded
+    assert hub.update_interval is None
+    for device_id, shard in hub.shards.items():
+        assert hub.for_device(device_id) is shard
+        assert shard.api is hub.api
+        # Entities subscribe to the coordinator of their own device
+        assert {context[0] for _, context in shard._listeners.values() if context is not None} == {device_id}
+        assert get_panel_entity_id(hass, device_id, 1) is not None
+
+
+async def test_failed_shard_is_retried(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker) -> None:
+    """Test a device whose first refresh failed is retried by the hub and gets its entities."""
+    failing = build_device_data(0, 1, 0)["deviceId"]
+    # Registered first, so it answers before the device mocked with the fleet
+    aioclient_mock.get(get_device_url(failing), status=429)
+    config_entry = mock_fleet(aioclient_mock, DEVICES, options={CONF_SHARDED: True})
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    hub = config_entry.runtime_data.coordinator
+    assert config_entry.state is ConfigEntryState.LOADED
+    assert hub.shards[failing].data is None
+    assert get_panel_entity_id(hass, failing, 1) is None
+    assert get_panel_entity_id(hass, build_device_data(1, 1, 0)["deviceId"], 1) is not None
+
+    aioclient_mock.clear_requests()
+    for index in range(DEVICES):
+        mock_device(aioclient_mock, index)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=DEFAULT_TIER_ALARM_INTERVAL + 1))
+    await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert failing in hub.shards[failing].data.olarm_state_data
+    assert failing in hub.data.olarm_state_data
+    assert (entity_id := get_panel_entity_id(hass, failing, 1)) is not None
+    assert hass.states.get(entity_id) is not None
+    assert not hub.get_shards_without_data()
@@ -0,0 +1,66 @@
+"""Startup benchmark of the Olarm integration for a large account."""
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from .common import mock_fleet
+
+DEVICES = 200
+AREAS = 2
+ZONES = 16
+# Seconds allowed from setup to the first entity, and to all platforms being set up
+FIRST_ENTITY_BUDGET = 2.0
+SETUP_BUDGET = 10.0
+# Seconds allowed for importing the integration's own modules, Home Assistant excluded
+IMPORT_BUDGET = 0.1
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(\S.*)$")
+
+
+async def test_time_to_first_entity(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker) -> None:
+    """Test setting up a large account reaches its first entity, and all of them, within budget."""
+    config_entry = mock_fleet(aioclient_mock, DEVICES, AREAS, ZONES)
+    config_entry.add_to_hass(hass)
+
+    started = perf_counter()
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    duration = perf_counter() - started
+
+    assert config_entry.state is ConfigEntryState.LOADED
+    assert len(hass.states.async_entity_ids(Platform.ALARM_CONTROL_PANEL)) == DEVICES * AREAS
+    timings = config_entry.runtime_data.coordinator.startup_timings
+    print(f"startup of {DEVICES} devices in {duration:.3f}s: {timings}")
+    assert timings["first_refresh"] <= timings["first_entity"] <= timings["platforms"]
+    assert timings["first_entity"] <= FIRST_ENTITY_BUDGET
+    assert duration <= SETUP_BUDGET
+
+
+def test_import_time() -> None:
+    """Test the integration's own modules import within budget."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import custom_components.olarm_int"],
+        cwd=Path(__file__).parent.parent, capture_output=True, text=True, check=True,
+    )
+    own = {
+        match[3].strip(): int(match[1])
+        for line in result.stderr.splitlines()
+        if (match := IMPORT_TIME_LINE.match(line)) and match[3].strip().startswith("custom_components.olarm_int")
+    }
+    print(f"integration import self times (us): {own}")
+    assert "custom_components.olarm_int" in own
+    # Modules only needed to record, replay or load test are imported when used
+    assert not own.keys() & {"custom_components.olarm_int.traffic", "custom_components.olarm_int.loadtest"}
+    assert sum(own.values()) / 1e6 <= IMPORT_BUDGET
@@ -0,0 +1,123 @@
+"""Tests for the Olarm webhook handler."""
+
+import asyncio
+from typing import Any
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.olarm_int.const import CONF_WEBHOOK_DEBOUNCE, CONF_WEBHOOK_SECRET, WEBHOOK_BATCH_LIMIT, AreaStatus, WebHookStates
+from custom_components.olarm_int.coordinator import OlarmCoordinator
+from custom_components.olarm_int.loadtest import build_area_event, sign_event
+from custom_components.olarm_int.traffic import ReplayRequest
+
+from .common import mock_fleet
+
+SECRET = "secret"
+DEVICES = 2
+AREAS = 2
+
+
+async def async_setup_fleet(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker) -> OlarmCoordinator:
+    """Set up a fleet whose webhook events are applied without a debounce, return its coordinator."""
+    config_entry = mock_fleet(aioclient_mock, DEVICES, AREAS, options={CONF_WEBHOOK_SECRET: SECRET, CONF_WEBHOOK_DEBOUNCE: 0})
+    config_entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    return config_entry.runtime_data.coordinator
+
+
+async def async_send(coordinator: OlarmCoordinator, data: Any, secret: str = SECRET) -> None:
+    """Send a signed webhook body to the handler."""
+    body, signature = sign_event(secret, data)
+    await coordinator.async_handle_webhook(coordinator.hass, coordinator.webhook_id, ReplayRequest(body, signature))
+
+
+async def async_wait_batches(coordinator: OlarmCoordinator, batches: int) -> None:
+    """Wait until the webhook consumer applied a number of batches."""
+    async with asyncio.timeout(5):
+        while coordinator.webhook_metrics.batches < batches:
+            await asyncio.sleep(0.01)
+
+
+def count_notifications(coordinator: OlarmCoordinator) -> dict[tuple[str, int], int]:
+    """Count the listener notifications of each area of the fleet."""
+    notifications = {}
+    for device_id in coordinator.get_olarm_conf_data():
+        for area_id in range(1, AREAS + 1):
+            context = (device_id, area_id)
+            notifications[context] = 0
+            coordinator.async_add_listener(
+                lambda context=context: notifications.__setitem__(context, notifications[context] + 1), context
+            )
+    return notifications
+
+
+async def test_rejects_unsigned_and_unadmitted_events(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker) -> None:
+    """Test events that are badly signed, for untracked devices or without effect never reach the queue."""
+    coordinator = await async_setup_fleet(hass, aioclient_mock)
+    device_id = next(iter(coordinator.get_olarm_conf_data()))
+    notifications = count_notifications(coordinator)
+
+    await async_send(coordinator, build_area_event(device_id, 1, WebHookStates.STAYARM1, 1), secret="other")
+    assert coordinator.webhook_metrics.rejected == 0
+
+    await async_send(coordinator, build_area_event("untracked", 1, WebHookStates.STAYARM1, 1))
+    await async_send(coordinator, build_area_event(device_id, 1, WebHookStates.STAYARM1, 1) | {"eventAction": "unsupported"})
+    await async_send(coordinator, build_area_event(device_id, 1, WebHookStates.STAYARM1, 1) | {"deviceId": ["not", "an", "id"]})
+    await hass.async_block_till_done()
+
+    assert coordinator.webhook_metrics.rejected == 3
+    assert coordinator._webhook_queue.empty()
+    assert coordinator._webhook_consumer is None
+    assert not any(notifications.values())
+    assert coordinator.data.olarm_state_data[device_id].alarm.areas[1].status == AreaStatus.DISARMED
+
+
+async def test_refuses_oversized_batch(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker) -> None:
+    """Test a body with more events than the batch limit is refused as a whole."""
+    coordinator = await async_setup_fleet(hass, aioclient_mock)
+    device_id = next(iter(coordinator.get_olarm_conf_data()))
+
+    await async_send(coordinator, [
+        build_area_event(device_id, 1, WebHookStates.STAYARM1, index + 1) for index in range(WEBHOOK_BATCH_LIMIT + 1)
+    ])
+    await hass.async_block_till_done()
+
+    assert coordinator._webhook_queue.empty()
+    assert coordinator._webhook_consumer is None
+    assert coordinator.data.olarm_state_data[device_id].alarm.areas[1].status == AreaStatus.DISARMED
+
+
+async def test_applies_batch_in_order(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker) -> None:
+    """Test a batch is applied in order, with one listener notification per changed area of each device."""
+    coordinator = await async_setup_fleet(hass, aioclient_mock)
+    first, second = coordinator.get_olarm_conf_data()
+    notifications = count_notifications(coordinator)
+
+    await async_send(coordinator, [
+        build_area_event(first, 1, WebHookStates.STAYARM1, 1),
+        build_area_event(second, 2, WebHookStates.STAYARM1, 1),
+        build_area_event(first, 1, WebHookStates.DISARMED, 2),
+        build_area_event(first, 2, WebHookStates.STAYARM1, 2),
+        build_area_event(first, 1, WebHookStates.STAYARM1, 3),
+        # Older than the event already applied to the area
+        build_area_event(second, 2, WebHookStates.DISARMED, 0.5),
+    ])
+    await async_wait_batches(coordinator, 1)
+
+    areas = {device_id: coordinator.data.olarm_state_data[device_id].alarm.areas for device_id in (first, second)}
+    assert areas[first][1].status == AreaStatus.PARTARM1
+    assert areas[first][2].status == AreaStatus.PARTARM1
+    assert areas[second][1].status == AreaStatus.DISARMED
+    assert areas[second][2].status == AreaStatus.PARTARM1
+    assert [entry.status for entry in coordinator.timelines[first][("area", 1)]][-3:] == [
+        AreaStatus.PARTARM1, AreaStatus.DISARMED, AreaStatus.PARTARM1
+    ]
+    assert notifications == {(first, 1): 1, (first, 2): 1, (second, 1): 0, (second, 2): 1}
+    assert coordinator.webhook_metrics.batches == 1
+    assert coordinator.webhook_metrics.stale == 1